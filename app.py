@@ -1,22 +1,71 @@
 from flask import Flask, render_template, redirect, url_for, flash, request, send_file, abort
+import click
+from collections import namedtuple
+from functools import lru_cache
 from config import Config
-from models import db, Category, Product, StockMovement
+from models import db, Category, Product, StockMovement, product_fts
 from forms import ProductForm, CategoryForm, StockMovementForm, ReportForm
-from datetime import datetime, timedelta
-from sqlalchemy import func
-import pandas as pd
-from openpyxl import Workbook
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager, joinedload
+# pandas, openpyxl, xlsxwriter and reportlab are imported inside the export
+# helpers, so only processes that build an export pay for loading them
 from io import BytesIO
+from tempfile import SpooledTemporaryFile
 from flask_wtf.csrf import CSRFProtect, generate_csrf
+from flask_caching import Cache
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
 csrf = CSRFProtect(app)
 
+cache = Cache(app)
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# Exports larger than this are spooled to a temporary file on disk
+EXPORT_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# Exports with more rows than this are written by xlsxwriter in constant-memory mode
+LARGE_EXPORT_ROWS = 5000
+PRODUCT_EXPORT_HEADERS = ['ID', 'Name', 'Barcode', 'Category', 'Price', 'Stock', 'Min Stock', 'Status', 'Total Value']
+MOVEMENT_EXPORT_HEADERS = ['Date', 'Product', 'Type', 'Amount', 'Previous Stock', 'New Stock', 'Description']
+PER_PAGE = 20
+# The dashboard PDF lists at most this many critical products
+PDF_CRITICAL_LIMIT = 100
+# Window used by the "last 30 days" figures on the analytics page and dashboard PDF
+RECENT_WINDOW = timedelta(days=30)
+# Movement type cell text in the PDF tables
+PDF_MOVEMENT_LABELS = {'inflow': '📈 Inflow', 'outflow': '📉 Outflow'}
+# Category cell text for products without a category (or with a deleted one)
+NO_CATEGORY_LABEL = 'N/A'
+
+# One page of a keyset-paginated list; the ids are the cursors for the links
+Pagination = namedtuple('Pagination', 'items has_prev has_next prev_before_id next_after_id')
+
+# Security headers added to every response unless a view already set them
+SECURITY_HEADERS = {
+    'Content-Security-Policy': (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
+        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
+        "img-src 'self' data:; "
+        "font-src 'self' https://cdnjs.cloudflare.com; "
+        "connect-src 'self'; "
+        "frame-ancestors 'self';"
+    ),
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'SAMEORIGIN',
+    'X-XSS-Protection': '1; mode=block',
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+    'Permissions-Policy': 'geolocation=(), microphone=(), camera=()',
+}
+
 db.init_app(app)
 
-with app.app_context():
+
+def init_db():
+    """Create the tables and add example categories to an empty database."""
     db.create_all()
 
     #if first category don't exist add a example category
@@ -30,161 +79,548 @@ with app.app_context():
         db.session.commit()
 
 
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the database tables and seed example categories."""
+    init_db()
+    click.echo('Database initialized.')
+
+
 @app.context_processor
 def inject_csrf_token():
-    """Expose CSRF token helper to all templates."""
+    """Expose CSRF token helper to all templates.
+
+    The helper is passed uncalled so pages without a form never touch the
+    session; Flask-WTF caches the token in ``g`` for repeated calls.
+    """
     return dict(csrf_token=generate_csrf)
 
 
 @app.after_request
 def add_security_headers(response):
     """Apply basic security headers to every response."""
-    csp = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
-        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
-        "img-src 'self' data:; "
-        "font-src 'self' https://cdnjs.cloudflare.com; "
-        "connect-src 'self'; "
-        "frame-ancestors 'self';"
+    for name, value in SECURITY_HEADERS.items():
+        response.headers.setdefault(name, value)
+    return response
+
+def _send_workbook(wb, filename):
+    """Send a workbook as a download without buffering it twice in memory.
+
+    The workbook is serialized into a spooled temporary file: small exports
+    stay in RAM, large ones spill to disk. No Content-Length is set, so the
+    file is streamed to the client in chunks. All rows have already been read
+    from the database at this point, so no connection is held while sending.
+    """
+    output = SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    wb.save(output)
+    return _send_download(output, filename, XLSX_MIMETYPE)
+
+def _send_large_workbook(sheets, filename):
+    """Write ``(title, headers, widths, rows)`` sheets with xlsxwriter and send them.
+
+    Constant-memory mode flushes every row to a temporary file as soon as the
+    next one starts, so memory stays flat however many rows are exported.
+    Cells in a ``Status`` column reading ``Critical`` are highlighted.
+    """
+    import xlsxwriter
+
+    output = SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    wb = xlsxwriter.Workbook(output, {'constant_memory': True})
+    header_format = wb.add_format({'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#366092', 'align': 'center'})
+    critical_format = wb.add_format({'bg_color': '#FF6B6B'})
+
+    for title, headers, widths, rows in sheets:
+        ws = wb.add_worksheet(title)
+        for col, width in enumerate(widths):
+            ws.set_column(col, col, width)
+        ws.write_row(0, 0, headers, header_format)
+
+        status_col = headers.index('Status') if 'Status' in headers else None
+        for row_number, row in enumerate(rows, 1):
+            ws.write_row(row_number, 0, row)
+            if status_col is not None and row[status_col] == 'Critical':
+                ws.write(row_number, status_col, row[status_col], critical_format)
+
+    wb.close()
+    return _send_download(output, filename, XLSX_MIMETYPE)
+
+def _build_pdf(story, output):
+    """Lay out ``story`` as an A4 PDF into the file object ``output``."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate
+
+    doc = SimpleDocTemplate(output, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    doc.build(story)
+
+def _send_pdf(story, filename):
+    """Build ``story`` in a spooled temporary file and send it as a PDF."""
+    output = SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    _build_pdf(story, output)
+    return _send_download(output, filename, 'application/pdf')
+
+def _send_download(output, filename, mimetype):
+    """Rewind a finished export file object and send it as an attachment."""
+    output.seek(0)
+
+    return send_file(
+        output,
+        download_name=filename,
+        as_attachment=True,
+        mimetype=mimetype
     )
 
-    response.headers.setdefault('Content-Security-Policy', csp)
-    response.headers.setdefault('X-Content-Type-Options', 'nosniff')
-    response.headers.setdefault('X-Frame-Options', 'SAMEORIGIN')
-    response.headers.setdefault('X-XSS-Protection', '1; mode=block')
-    response.headers.setdefault('Referrer-Policy', 'strict-origin-when-cross-origin')
-    response.headers.setdefault('Permissions-Policy', 'geolocation=(), microphone=(), camera=()')
-    return response
+def _product_export_rows(query):
+    """Yield one export row per product, fetching plain rows in batches.
 
-@app.route('/')
-def index():
-    """Main Page - Dashboard """
-    total_product = Product.query.count()
-    total_stock = db.session.query(func.sum(Product.stock)).scalar() or 0
-    critical_stock = Product.query.filter(Product.stock <= Product.min_stock).count()
-    total_value = db.session.query(func.sum(Product.stock * Product.price)).scalar() or 0
+    Only the exported columns are selected, so no Product objects are built
+    or tracked by the session.
+    """
+    rows = query.outerjoin(Product.categorie).with_entities(
+        Product.id,
+        Product.name,
+        Product.barcode,
+        Category.name,
+        Product.price,
+        Product.stock,
+        Product.min_stock,
+        Product.critical_stock
+    )
+    for product_id, name, barcode, category_name, price, stock, min_stock, critical in rows.yield_per(1000):
+        yield [
+            product_id,
+            name,
+            barcode or '',
+            category_name or NO_CATEGORY_LABEL,
+            price,
+            stock,
+            min_stock,
+            'Critical' if critical else 'Normal',
+            stock * price
+        ]
+
+def _movement_export_rows(query):
+    """Yield one export row per stock movement, newest first."""
+    query = query.options(joinedload(StockMovement.product)).order_by(StockMovement.date.desc())
+    for movement in query.yield_per(1000):
+        yield [
+            movement.date.strftime('%Y-%m-%d %H:%M'),
+            movement.product.name,
+            movement.type.title(),
+            movement.amount,
+            movement.previous_stock,
+            movement.new_stock,
+            movement.description or ''
+        ]
+
+def _report_filters():
+    """Parse the category and date range query arguments of the report exports.
+
+    Returns ``(category_id, start, end)``; the dates are only set when both
+    are given. Malformed values abort with 400.
+    """
+    category_id = None
+    category_id_param = request.args.get('category_id', '')
+    if category_id_param not in (None, ''):
+        try:
+            category_id = int(category_id_param)
+        except (TypeError, ValueError):
+            abort(400, description='Invalid category identifier')
+
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    start = end = None
+    if start_date and end_date:
+        try:
+            # strptime rather than date.fromisoformat, which on Python 3.11+
+            # also accepts forms such as 20240101 and 2024-W01-1
+            start = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            abort(400, description='Invalid date range supplied')
+
+    return category_id, start, end
+
+def _export_filename(prefix, extension, generated_at=None):
+    """Build a timestamped download name such as ``products_20240131_094500.xlsx``."""
+    generated_at = generated_at or datetime.now()
+    return f"{prefix}_{generated_at.strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+def _pdf_description(description, length):
+    """Description for a PDF table cell, cut to ``length`` characters."""
+    if not description:
+        return 'N/A'
+    return description if len(description) <= length else description[:length] + '...'
+
+def _pdf_table(rows, col_widths, style_key, repeat_rows=0):
+    """Build a PDF table with column widths in inches and a shared style from _pdf_styles."""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table
+
+    table = Table(rows, colWidths=[width * inch for width in col_widths], repeatRows=repeat_rows)
+    table.setStyle(_pdf_styles()[style_key])
+    return table
+
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    """Paragraph and table styles shared by the PDF exports, built once per process."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    sample = getSampleStyleSheet()
+    return {
+        'normal': sample['Normal'],
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=sample['Heading1'],
+            fontSize=26,
+            spaceAfter=30,
+            alignment=1,
+            textColor=colors.darkblue
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=sample['Heading2'],
+            fontSize=16,
+            spaceAfter=15,
+            spaceBefore=20,
+            textColor=colors.darkblue,
+            borderWidth=1,
+            borderColor=colors.darkblue,
+            borderPadding=5,
+            backColor=colors.lightblue
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=sample['Normal'],
+            fontSize=8,
+            alignment=1,
+            textColor=colors.grey
+        ),
+        'report_products': TableStyle([
+            # Header
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+
+            # Data rows
+            ('BACKGROUND', (0, 1), (-1, -2), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -2), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -2), 9),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lightgrey]),
 
-    last_movements = StockMovement.query.order_by(StockMovement.date.desc()).limit(10).all()
+            # Summary row
+            ('BACKGROUND', (0, -1), (-1, -1), colors.darkgreen),
+            ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, -1), (-1, -1), 10)
+        ]),
+        'report_movements': TableStyle([
+            # Header
+            ('BACKGROUND', (0, 0), (-1, 0), colors.purple),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+
+            # Data rows
+            ('BACKGROUND', (0, 1), (-1, -2), colors.lavender),
+            ('GRID', (0, 0), (-1, -2), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -2), 8),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lavender]),
+
+            # Summary row
+            ('BACKGROUND', (0, -1), (-1, -1), colors.darkred),
+            ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, -1), (-1, -1), 9)
+        ]),
+        'dashboard_summary': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+        ]),
+        'dashboard_critical': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.red),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.mistyrose),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 9)
+        ]),
+        'dashboard_categories': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgreen])
+        ]),
+        'dashboard_movements': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.purple),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lavender),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lavender])
+        ])
+    }
+
+def _seek_page(query, key, after_id=None, before_id=None, per_page=PER_PAGE):
+    """Return one Pagination of rows ordered by ``key``.
 
-    critical_products = Product.query.filter(Product.stock <= Product.min_stock).all()
+    Keyset pagination keeps deep pages as cheap as the first one: ``after_id``
+    pages forward and ``before_id`` pages back. One extra row is fetched to
+    learn whether another page follows in that direction, so no COUNT query
+    is needed.
+    """
+    if before_id:
+        items = query.filter(key < before_id).order_by(key.desc()).limit(per_page + 1).all()
+        has_prev, has_next = len(items) > per_page, True
+        items = items[:per_page][::-1]
+    else:
+        if after_id:
+            query = query.filter(key > after_id)
+        items = query.order_by(key).limit(per_page + 1).all()
+        has_prev, has_next = bool(after_id), len(items) > per_page
+        items = items[:per_page]
+
+    return Pagination(
+        items=items,
+        has_prev=has_prev and bool(items),
+        has_next=has_next and bool(items),
+        prev_before_id=items[0].id if has_prev and items else None,
+        next_after_id=items[-1].id if has_next and items else None
+    )
+
+def _filter_product_name(query, search):
+    """Restrict ``query`` to products whose name contains ``search``.
+
+    On SQLite the lookup goes through the trigram FTS index. Trigrams need at
+    least three characters, so shorter terms (and other databases, where a
+    trigram index backs LIKE) fall back to a LIKE with ``%``/``_`` escaped.
+    """
+    if len(search) >= 3 and db.engine.dialect.name == 'sqlite':
+        phrase = '"{}"'.format(search.replace('"', '""'))
+        return query.join(product_fts, product_fts.c.rowid == Product.id) \
+                    .filter(product_fts.c.name.match(phrase))
+    return query.filter(Product.name.contains(search, autoescape=True))
+
+def _dashboard_version():
+    """Return a value that changes whenever the dashboard figures change.
+
+    Built from index lookups only: new movements raise the highest movement
+    id, and movements are only deleted together with their product. The
+    product count is the one index scan, over the smaller table.
+    """
+    return db.session.query(
+        select(func.max(StockMovement.id)).scalar_subquery(),
+        select(func.max(Product.updated_at)).scalar_subquery(),
+        select(func.count(Product.id)).scalar_subquery()
+    ).one()
+
+@cache.memoize(timeout=60)
+def _dashboard_payload(version):
+    """Dashboard figures for one data version (see _dashboard_version)."""
+    total_product, total_stock, total_value = db.session.query(
+        func.count(Product.id),
+        func.coalesce(func.sum(Product.stock), 0),
+        func.coalesce(func.sum(Product.stock * Product.price), 0)
+    ).one()
+
+    last_movements = db.session.query(
+        StockMovement.type,
+        StockMovement.amount,
+        StockMovement.date,
+        Product.name.label('product_name')
+    ).join(Product).order_by(StockMovement.date.desc()).limit(10).all()
+
+    critical_products = db.session.query(
+        Product.name,
+        Product.barcode,
+        Product.stock,
+        Product.min_stock
+    ).filter(Product.critical_stock).all()
+    critical_stock = len(critical_products)
+
+    # Plain dicts, so the payload can be stored in any cache backend
+    return {
+        'total_product': total_product,
+        'total_stock': total_stock,
+        'critical_stock': critical_stock,
+        'total_value': total_value,
+        'last_movements': [row._asdict() for row in last_movements],
+        'critical_products': [row._asdict() for row in critical_products]
+    }
+
+def _category_version():
+    """Return a value that changes when categories are added or deleted elsewhere.
 
-    return render_template('index.html',
-                       total_product = total_product,
-                       total_stock = total_stock,
-                       critical_stock = critical_stock,
-                       total_value = total_value,
-                       last_movements = last_movements,
-                       critical_products = critical_products)
+    Not exact: SQLite reuses the highest id, so deleting the last category and
+    adding another leaves it unchanged. The category routes therefore also
+    clear the caches keyed on it.
+    """
+    return db.session.query(func.max(Category.id), func.count(Category.id)).one()
+
+@cache.memoize(timeout=300)
+def _category_choices(version):
+    """(id, name) pairs for category select fields (see _category_version).
+
+    Every category route also clears this with ``delete_memoized``.
+    """
+    rows = db.session.query(Category.id, Category.name).order_by(Category.name).all()
+    return [tuple(row) for row in rows]
+
+@cache.memoize(timeout=300)
+def _product_choices(version):
+    """(id, label) pairs for the stock movement product field (see _product_version)."""
+    rows = db.session.query(Product.id, Product.stock).order_by(Product.id).all()
+    return [(product_id, f'{product_id} (Stock: {stock})') for product_id, stock in rows]
+
+@app.route('/')
+def index():
+    """Main Page - Dashboard """
+    payload = _dashboard_payload(_dashboard_version())
+    return render_template('index.html', **payload)
 
 @app.route('/products')
 def product_list():
     """Lists All Products"""
-    page = request.args.get('page', 1, type=int)
+    after_id = request.args.get('after_id', type=int)
+    before_id = request.args.get('before_id', type=int)
     category_id = request.args.get('category', type=int)
     search = request.args.get('search', '')
-    query = Product.query
+    # The list shows each product's category name
+    query = Product.query.options(joinedload(Product.categorie))
 
     if category_id:
         query = query.filter_by(category_id=category_id)
     
     if search:
-        query = query.filter(Product.name.like(f'%{search}%'))
-
-    products = query.paginate(page=page, per_page=20, error_out=False)
+        query = _filter_product_name(query, search)
 
-    categories = Category.query.all()
+    pagination = _seek_page(query, Product.id, after_id, before_id)
 
     return render_template('product_list.html',
-                           products=products,
-                           categories=categories,
+                           products=pagination.items,
+                           pagination=pagination,
+                           categories=_category_choices(_category_version()),
                            selected_category=category_id,
                            search=search)
 
-@app.route('/products/export/excel')
-def export_products_excel():
-    """Export products to Excel"""
-    category_id = request.args.get('category', type=int)
-    search = request.args.get('search', '')
-    
+def _product_version():
+    """Return a value that changes whenever a product is added, edited or deleted."""
+    return db.session.query(func.max(Product.updated_at), func.count(Product.id)).one()
+
+def _product_export_query(category_id, search):
+    """Products matching the product list filters."""
     query = Product.query
     if category_id:
         query = query.filter_by(category_id=category_id)
     if search:
-        query = query.filter(Product.name.like(f'%{search}%'))
-    
-    products = query.all()
-    
+        query = _filter_product_name(query, search)
+    return query
+
+def _product_export_widths(query):
+    """Excel column widths for a product export.
+
+    Column widths must be set before the first row is written, so the text
+    columns are sized from the longest values in SQL (capped at 50).
+    """
+    text_lengths = query.outerjoin(Product.categorie).with_entities(
+        func.max(func.length(Product.name)),
+        func.max(func.length(Product.barcode)),
+        func.max(func.length(Category.name))
+    ).one()
+    name_width, barcode_width, category_width = (
+        min(max(length or 0, minimum) + 2, 50)
+        for length, minimum in zip(text_lengths, (len('Name'), len('Barcode'), len('Category')))
+    )
+    return (8, name_width, barcode_width, category_width, 12, 10, 12, 12, 15)
+
+@cache.memoize(timeout=300)
+def _products_workbook(version, category_id, search):
+    """Product export workbook bytes for one data version (see _product_version).
+
+    Category names are not part of the version, so editing a category clears
+    this with ``delete_memoized`` (per process; see the README on caching).
+    """
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, PatternFill, Alignment
-    from io import BytesIO
-    from flask import send_file
-    from datetime import datetime
+
+    query = _product_export_query(category_id, search)
     
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Products"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Products")
+    for letter, width in zip('ABCDEFGHI', _product_export_widths(query)):
+        ws.column_dimensions[letter].width = width
     
     # Header style
     header_font = Font(bold=True, color="FFFFFF")
     header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_alignment = Alignment(horizontal="center")
+    critical_fill = PatternFill(start_color="FF6B6B", end_color="FF6B6B", fill_type="solid")
     
     # Headers
-    headers = ['ID', 'Name', 'Barcode', 'Category', 'Price', 'Stock', 'Min Stock', 'Status', 'Total Value']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
+    header_cells = []
+    for header in PRODUCT_EXPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
         cell.font = header_font
         cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+    
+    # Data (streamed from the database in batches)
+    for row in _product_export_rows(query):
+        if row[7] == 'Critical':
+            row[7] = WriteOnlyCell(ws, value='Critical')
+            row[7].fill = critical_fill
+        ws.append(row)
     
-    # Data
-    for row, product in enumerate(products, 2):
-        status = 'Critical' if product.critical_stock else 'Normal'
-        total_value = product.stock * product.price
-        
-        data = [
-            product.id,
-            product.name,
-            product.barcode or '',
-            product.categorie.name,
-            product.price,
-            product.stock,
-            product.min_stock,
-            status,
-            total_value
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row, column=col, value=value)
-            if col == 8 and value == 'Critical':  # Status column
-                cell.fill = PatternFill(start_color="FF6B6B", end_color="FF6B6B", fill_type="solid")
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save to BytesIO
     output = BytesIO()
     wb.save(output)
-    output.seek(0)
+    return output.getvalue()
+
+@app.route('/products/export/excel')
+def export_products_excel():
+    """Export products to Excel"""
+    category_id = request.args.get('category', type=int)
+    search = request.args.get('search', '')
+    filename = _export_filename('products', 'xlsx')
     
-    filename = f"products_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    query = _product_export_query(category_id, search)
+    if query.count() > LARGE_EXPORT_ROWS:
+        # Too big to keep in the cache; stream it with xlsxwriter instead
+        sheets = [("Products", PRODUCT_EXPORT_HEADERS, _product_export_widths(query), _product_export_rows(query))]
+        return _send_large_workbook(sheets, filename)
     
-    return send_file(
-        output,
-        download_name=filename,
-        as_attachment=True,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    xlsx = _products_workbook(_product_version(), category_id, search)
+    return _send_download(BytesIO(xlsx), filename, XLSX_MIMETYPE)
 
 @app.route('/product/delete/<int:id>', methods=['POST'])
 def delete_product(id):
@@ -195,24 +631,25 @@ def delete_product(id):
     force_delete = request.form.get('force_delete') == 'true'
     
     # Check if product has stock movements
-    movements = StockMovement.query.filter_by(product_id=id).all()
-    if movements and not force_delete:
+    movements = StockMovement.query.filter_by(product_id=id)
+    has_movements = db.session.query(movements.exists()).scalar()
+    if has_movements and not force_delete:
+        movement_count = movements.count()
         # Return JSON response for AJAX handling
         return jsonify({
             'success': False,
             'has_movements': True,
-            'movement_count': len(movements),
+            'movement_count': movement_count,
             'product_name': product.name,
-            'message': f'Product "{product.name}" has {len(movements)} stock movements. Do you want to delete them too?'
+            'message': f'Product "{product.name}" has {movement_count} stock movements. Do you want to delete them too?'
         })
     
     product_name = product.name
     
-    # If force delete, remove all stock movements first
-    if force_delete and movements:
-        for movement in movements:
-            db.session.delete(movement)
-        flash(f'Deleted {len(movements)} stock movements for product "{product_name}"', 'info')
+    # If force delete, remove all stock movements first (single bulk DELETE)
+    if force_delete and has_movements:
+        deleted = movements.delete(synchronize_session=False)
+        flash(f'Deleted {deleted} stock movements for product "{product_name}"', 'info')
     
     db.session.delete(product)
     db.session.commit()
@@ -230,7 +667,7 @@ def add_product():
     """Adds a new product"""
     form = ProductForm()
 
-    form.category_id.choices = [(k.id, k.name) for k in Category.query.all()]
+    form.category_id.choices = _category_choices(_category_version())
 
     if form.validate_on_submit():
         # Handle empty barcode
@@ -246,21 +683,28 @@ def add_product():
             min_stock = form.min_stock.data,
             category_id = form.category_id.data
         )
-        db.session.add(product)
-        db.session.commit()
+        # Product and opening movement are written in a single transaction;
+        # flush() assigns product.id without committing.
+        try:
+            db.session.add(product)
+            db.session.flush()
 
-        movement = StockMovement(
-            product_id = product.id,
-            type = 'inflow',
-            amount=form.stock.data,
-            previous_stock= 0,
-            new_stock=form.stock.data,
-            description='First stock inflow'
-        )
-        db.session.add(movement)
-        db.session.commit()
+            movement = StockMovement(
+                product_id = product.id,
+                type = 'inflow',
+                amount=form.stock.data,
+                previous_stock= 0,
+                new_stock=form.stock.data,
+                description='First stock inflow'
+            )
+            db.session.add(movement)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash('Product could not be saved, the barcode is already in use!', 'danger')
+            return render_template('product_add.html', form=form)
 
-        flash(f'{product.name} was saccsessfully added!', 'success')
+        flash(f'{product.name} was successfully added!', 'success')
 
         return redirect(url_for('product_list'))
     
@@ -271,7 +715,7 @@ def edit_product(id):
     """Edit Product"""
     product = Product.query.get_or_404(id)
     form = ProductForm(obj=product)
-    form.category_id.choices = [(k.id, k.name) for k in Category.query.all()]
+    form.category_id.choices = _category_choices(_category_version())
 
     if form.validate_on_submit():
         # Handle empty barcode
@@ -296,7 +740,7 @@ def stock_movement():
 
     form = StockMovementForm()
 
-    form.product_id.choices = [(u.id, f'{u.id} (Stock: {u.stock})') for u in Product.query.all()]
+    form.product_id.choices = _product_choices(_product_version())
 
     if form.validate_on_submit():
         product = Product.query.get(form.product_id.data)
@@ -330,16 +774,28 @@ def stock_movement():
 @app.route('/categories')
 def category_list():
     """Lists all categories"""
-    page = request.args.get('page', 1, type=int)
+    after_id = request.args.get('after_id', type=int)
+    before_id = request.args.get('before_id', type=int)
     search = request.args.get('search', '')
     query = Category.query
     
     if search:
-        query = query.filter(Category.name.like(f'%{search}%'))
-    
-    categories = query.paginate(page=page, per_page=20, error_out=False)
+        query = query.filter(Category.name.contains(search, autoescape=True))
+    
+    pagination = _seek_page(query, Category.id, after_id, before_id)
+    categories = pagination.items
+    product_counts = dict(
+        db.session.query(Product.category_id, func.count(Product.id))
+        .filter(Product.category_id.in_([category.id for category in categories]))
+        .group_by(Product.category_id)
+        .all()
+    )
     
-    return render_template('category_list.html', categories=categories, search=search)
+    return render_template('category_list.html',
+                           categories=categories,
+                           product_counts=product_counts,
+                           pagination=pagination,
+                           search=search)
 
 @app.route('/category/add', methods=['GET', 'POST'])
 def add_category():
@@ -353,6 +809,9 @@ def add_category():
         )
         db.session.add(category)
         db.session.commit()
+        # The version can miss an add that reuses a deleted id
+        cache.delete_memoized(_category_choices)
+        cache.delete_memoized(_dashboard_pdf)
         
         flash(f'Category "{category.name}" was successfully added!', 'success')
         return redirect(url_for('category_list'))
@@ -370,10 +829,23 @@ def edit_category(id):
         category.description = form.description.data
         
         db.session.commit()
+        # Renames do not change any data version. This only clears the
+        # current process, so multi-worker setups need a shared cache.
+        cache.delete_memoized(_category_choices)
+        cache.delete_memoized(_dashboard_pdf)
+        cache.delete_memoized(_products_workbook)
         flash(f'Category "{category.name}" was updated!', 'success')
         return redirect(url_for('category_list'))
     
-    return render_template('category_edit.html', form=form, category=category)
+    # The page shows a count and the first five products, so avoid loading the whole collection
+    products = Product.query.filter_by(category_id=id)
+    return render_template(
+        'category_edit.html',
+        form=form,
+        category=category,
+        product_count=products.count(),
+        preview_products=products.order_by(Product.id).limit(5).all()
+    )
 
 @app.route('/category/delete/<int:id>', methods=['POST'])
 def delete_category(id):
@@ -381,13 +853,16 @@ def delete_category(id):
     category = Category.query.get_or_404(id)
     
     # Check if category has products
-    if category.products:
-        flash(f'Cannot delete category "{category.name}" because it has {len(category.products)} products!', 'danger')
+    products = Product.query.filter_by(category_id=id)
+    if db.session.query(products.exists()).scalar():
+        flash(f'Cannot delete category "{category.name}" because it has {products.count()} products!', 'danger')
         return redirect(url_for('category_list'))
     
     category_name = category.name
     db.session.delete(category)
     db.session.commit()
+    cache.delete_memoized(_category_choices)
+    cache.delete_memoized(_dashboard_pdf)
     
     flash(f'Category "{category_name}" was deleted!', 'success')
     return redirect(url_for('category_list'))
@@ -396,17 +871,14 @@ def delete_category(id):
 @app.route('/analytics')
 def analytics():
     """Advanced Analytics Dashboard"""
-    import pandas as pd
-    from datetime import datetime, timedelta
-    
-    # Get all data
-    products = Product.query.all()
-    categories = Category.query.all()
-    movements = StockMovement.query.all()
+    thirty_days_ago = datetime.now() - RECENT_WINDOW
     
     # Stock Status Analysis
-    total_products = len(products)
-    critical_products = len([p for p in products if p.critical_stock])
+    total_products, critical_products, total_stock_value = db.session.query(
+        func.count(Product.id),
+        func.count(Product.id).filter(Product.critical_stock),
+        func.coalesce(func.sum(Product.stock * Product.price), 0)
+    ).one()
     normal_products = total_products - critical_products
     
     stock_status_data = {
@@ -415,54 +887,52 @@ def analytics():
         'colors': ['#28a745', '#dc3545']
     }
     
-    # Category Distribution
-    category_data = {}
-    for category in categories:
-        category_data[category.name] = len(category.products)
+    # Product count and stock value per category
+    category_rows = db.session.query(
+        Category.name,
+        func.count(Product.id),
+        func.coalesce(func.sum(Product.stock * Product.price), 0)
+    ).outerjoin(Product).group_by(Category.id).order_by(Category.id).all()
     
+    # Category Distribution
     category_chart_data = {
-        'labels': list(category_data.keys()),
-        'data': list(category_data.values()),
+        'labels': [name for name, _, _ in category_rows],
+        'data': [count for _, count, _ in category_rows],
         'colors': ['#007bff', '#28a745', '#ffc107', '#dc3545', '#6f42c1', '#fd7e14', '#20c997', '#e83e8c']
     }
     
     # Stock Value by Category
-    category_values = {}
-    for category in categories:
-        total_value = sum(p.stock * p.price for p in category.products)
-        category_values[category.name] = round(total_value, 2)
-    
     value_chart_data = {
-        'labels': list(category_values.keys()),
-        'data': list(category_values.values()),
+        'labels': [name for name, _, _ in category_rows],
+        'data': [round(value, 2) for _, _, value in category_rows],
         'colors': ['#007bff', '#28a745', '#ffc107', '#dc3545', '#6f42c1', '#fd7e14', '#20c997', '#e83e8c']
     }
     
-    # Stock Movement Trends (Last 30 days)
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_movements = [m for m in movements if m.date >= thirty_days_ago]
-    
-    # Group movements by date
-    movement_by_date = {}
-    for movement in recent_movements:
-        date_str = movement.date.strftime('%Y-%m-%d')
-        if date_str not in movement_by_date:
-            movement_by_date[date_str] = {'inflow': 0, 'outflow': 0}
-        movement_by_date[date_str][movement.type] += movement.amount
-    
-    # Sort by date
-    sorted_dates = sorted(movement_by_date.keys())
-    
-    trend_data = {
-        'labels': sorted_dates,
-        'inflow': [movement_by_date[date]['inflow'] for date in sorted_dates],
-        'outflow': [movement_by_date[date]['outflow'] for date in sorted_dates]
-    }
+    # Stock Movement Trends (Last 30 days), summed per day and type
+    movement_day = func.date(StockMovement.date)
+    trend_rows = db.session.query(
+        movement_day,
+        StockMovement.type,
+        func.sum(StockMovement.amount)
+    ).filter(
+        StockMovement.date >= thirty_days_ago
+    ).group_by(movement_day, StockMovement.type).order_by(movement_day).all()
+    
+    # Rows arrive sorted by day, so one pass builds the chart series
+    trend_data = {'labels': [], 'inflow': [], 'outflow': []}
+    for day, movement_type, amount in trend_rows:
+        day = str(day)
+        if not trend_data['labels'] or trend_data['labels'][-1] != day:
+            trend_data['labels'].append(day)
+            trend_data['inflow'].append(0)
+            trend_data['outflow'].append(0)
+        trend_data[movement_type][-1] += amount
     
     # Top Products by Stock Value
-    product_values = [(p.name, p.stock * p.price) for p in products]
-    product_values.sort(key=lambda x: x[1], reverse=True)
-    top_products = product_values[:10]
+    product_value = Product.stock * Product.price
+    top_products = db.session.query(Product.name, product_value).order_by(
+        product_value.desc()
+    ).limit(10).all()
     
     top_products_data = {
         'labels': [p[0] for p in top_products],
@@ -471,12 +941,13 @@ def analytics():
     }
     
     # Calculate summary statistics
-    total_stock_value = sum(p.stock * p.price for p in products)
-    total_inflow = sum(m.amount for m in recent_movements if m.type == 'inflow')
-    total_outflow = sum(m.amount for m in recent_movements if m.type == 'outflow')
+    total_inflow = sum(trend_data['inflow'])
+    total_outflow = sum(trend_data['outflow'])
     
     # Low stock alerts
-    low_stock_products = [p for p in products if p.stock <= p.min_stock * 1.2]  # 20% above minimum
+    low_stock_products = Product.query.filter(
+        Product.stock <= Product.min_stock * 1.2  # 20% above minimum
+    ).all()
     
     analytics_data = {
         'stock_status': stock_status_data,
@@ -487,7 +958,7 @@ def analytics():
         'summary': {
             'total_products': total_products,
             'critical_products': critical_products,
-            'total_categories': len(categories),
+            'total_categories': len(category_rows),
             'total_stock_value': round(total_stock_value, 2),
             'total_inflow': total_inflow,
             'total_outflow': total_outflow,
@@ -504,11 +975,10 @@ def analytics():
 def reports():
     """Reports page"""
     form = ReportForm()
-    form.category_id.choices = [('', 'All Categories')] + [(c.id, c.name) for c in Category.query.all()]
+    form.category_id.choices = [('', 'All Categories')] + _category_choices(_category_version())
     
     # Default date range (last 30 days)
-    from datetime import date, timedelta
-    form.starting_date.data = date.today() - timedelta(days=30)
+    form.starting_date.data = date.today() - RECENT_WINDOW
     form.ending_date.data = date.today()
     
     return render_template('reports.html', form=form)
@@ -517,7 +987,7 @@ def reports():
 def generate_report():
     """Generate report based on filters"""
     form = ReportForm()
-    form.category_id.choices = [('', 'All Categories')] + [(c.id, c.name) for c in Category.query.all()]
+    form.category_id.choices = [('', 'All Categories')] + _category_choices(_category_version())
     
     if form.validate_on_submit():
         # Filter products
@@ -532,22 +1002,28 @@ def generate_report():
         if category_id:
             query = query.filter_by(category_id=category_id)
         
-        products = query.all()
+        products = query.options(joinedload(Product.categorie)).all()
         
-        # Filter stock movements
-        movement_query = StockMovement.query.filter(
+        # Filter stock movements; the product is loaded by the same join
+        movement_query = StockMovement.query.join(StockMovement.product).options(
+            contains_eager(StockMovement.product)
+        ).filter(
             StockMovement.date >= form.starting_date.data,
             StockMovement.date <= form.ending_date.data
         )
         
         if category_id:
-            movement_query = movement_query.join(Product).filter(Product.category_id == category_id)
+            movement_query = movement_query.filter(Product.category_id == category_id)
         
         movements = movement_query.order_by(StockMovement.date.desc()).all()
         
-        # Calculate statistics
-        total_inflow = sum(m.amount for m in movements if m.type == 'inflow')
-        total_outflow = sum(m.amount for m in movements if m.type == 'outflow')
+        # Calculate statistics in a single pass over the movements
+        totals = {'inflow': 0, 'outflow': 0}
+        for movement in movements:
+            if movement.type in totals:
+                totals[movement.type] += movement.amount
+        total_inflow = totals['inflow']
+        total_outflow = totals['outflow']
         
         report_data = {
             'products': products,
@@ -569,56 +1045,14 @@ def generate_report():
 @app.route('/reports/export/excel')
 def export_excel():
     """Export report to Excel"""
-    # Get filter parameters
-    category_id_param = request.args.get('category_id', '')
-    category_id = None
-    if category_id_param not in (None, ''):
-        try:
-            category_id = int(category_id_param)
-        except (TypeError, ValueError):
-            abort(400, description='Invalid category identifier')
+    from openpyxl import Workbook
 
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    start = end = None
-    if start_date and end_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            abort(400, description='Invalid date range supplied')
-    
-    # Create Excel file
-    wb = Workbook()
-    
-    # Products sheet
-    ws_products = wb.active
-    ws_products.title = "Products"
-    ws_products.append(['ID', 'Name', 'Barcode', 'Category', 'Price', 'Stock', 'Min Stock', 'Status', 'Total Value'])
+    category_id, start, end = _report_filters()
     
     query = Product.query
     if category_id:
         query = query.filter_by(category_id=category_id)
     
-    for product in query.all():
-        status = 'Critical' if product.critical_stock else 'Normal'
-        total_value = product.stock * product.price
-        ws_products.append([
-            product.id,
-            product.name,
-            product.barcode or '',
-            product.categorie.name,
-            product.price,
-            product.stock,
-            product.min_stock,
-            status,
-            total_value
-        ])
-    
-    # Stock Movements sheet
-    ws_movements = wb.create_sheet("Stock Movements")
-    ws_movements.append(['Date', 'Product', 'Type', 'Amount', 'Previous Stock', 'New Stock', 'Description'])
-    
     movement_query = StockMovement.query
     if start and end:
         movement_query = movement_query.filter(
@@ -629,141 +1063,108 @@ def export_excel():
     if category_id:
         movement_query = movement_query.join(Product).filter(Product.category_id == category_id)
     
-    for movement in movement_query.order_by(StockMovement.date.desc()).all():
-        ws_movements.append([
-            movement.date.strftime('%Y-%m-%d %H:%M'),
-            movement.product.name,
-            movement.type.title(),
-            movement.amount,
-            movement.previous_stock,
-            movement.new_stock,
-            movement.description or ''
-        ])
-    
-    # Save to BytesIO
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
+    sheets = [
+        ("Products", PRODUCT_EXPORT_HEADERS, (8, 30, 18, 20, 12, 10, 12, 12, 15), _product_export_rows(query)),
+        ("Stock Movements", MOVEMENT_EXPORT_HEADERS, (18, 30, 10, 10, 15, 12, 40), _movement_export_rows(movement_query))
+    ]
+    filename = _export_filename('stock_report', 'xlsx')
     
-    filename = f"stock_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    if query.count() + movement_query.count() > LARGE_EXPORT_ROWS:
+        return _send_large_workbook(sheets, filename)
     
-    return send_file(
-        output,
-        download_name=filename,
-        as_attachment=True,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    # Create Excel file
+    wb = Workbook(write_only=True)
+    for title, headers, widths, rows in sheets:
+        ws = wb.create_sheet(title)
+        for letter, width in zip('ABCDEFGHI', widths):
+            ws.column_dimensions[letter].width = width
+        ws.append(headers)
+        for row in rows:
+            ws.append(row)
+    
+    return _send_workbook(wb, filename)
 
 @app.route('/reports/export/pdf')
 def export_pdf():
     """Export detailed report to PDF"""
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    
-    # Get filter parameters
-    category_id_param = request.args.get('category_id', '')
-    category_id = None
-    if category_id_param not in (None, ''):
-        try:
-            category_id = int(category_id_param)
-        except (TypeError, ValueError):
-            abort(400, description='Invalid category identifier')
+    import pandas as pd
+    from reportlab.platypus import Paragraph, Spacer
 
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    start = end = None
-    if start_date and end_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            abort(400, description='Invalid date range supplied')
+    category_id, start, end = _report_filters()
+    generated_at = datetime.now()
     
     # Create PDF
-    output = BytesIO()
-    doc = SimpleDocTemplate(output, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
+    styles = _pdf_styles()
     story = []
     
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=26,
-        spaceAfter=30,
-        alignment=1,
-        textColor=colors.darkblue
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=15,
-        spaceBefore=20,
-        textColor=colors.darkblue,
-        borderWidth=1,
-        borderColor=colors.darkblue,
-        borderPadding=5,
-        backColor=colors.lightblue
-    )
-    
     # Header
-    story.append(Paragraph("📊 DETAILED STOCK REPORT", title_style))
-    story.append(Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y at %H:%M:%S')}", styles['Normal']))
+    story.append(Paragraph("📊 DETAILED STOCK REPORT", styles['title']))
+    story.append(Paragraph(f"Generated on: {generated_at.strftime('%B %d, %Y at %H:%M:%S')}", styles['normal']))
     
-    # Report parameters
-    if category_id or start_date or end_date:
+    # Report parameters (shown for a half-open date range too, which is ignored)
+    date_given = request.args.get('start_date') or request.args.get('end_date')
+    if category_id or date_given:
         story.append(Spacer(1, 15))
-        story.append(Paragraph("🔍 REPORT FILTERS", heading_style))
+        story.append(Paragraph("🔍 REPORT FILTERS", styles['heading']))
         
         if category_id:
             category = Category.query.get(category_id)
-            story.append(Paragraph(f"📁 Category: <b>{category.name}</b>", styles['Normal']))
+            story.append(Paragraph(f"📁 Category: <b>{category.name}</b>", styles['normal']))
         else:
-            story.append(Paragraph("📁 Category: <b>All Categories</b>", styles['Normal']))
+            story.append(Paragraph("📁 Category: <b>All Categories</b>", styles['normal']))
             
         if start and end:
-            story.append(Paragraph(f"📅 Date Range: <b>{start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}</b>", styles['Normal']))
+            story.append(Paragraph(f"📅 Date Range: <b>{start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}</b>", styles['normal']))
+        elif date_given:
+            story.append(Paragraph("📅 Date Range: <b>All Time</b> (both a start and an end date are needed)", styles['normal']))
         else:
-            story.append(Paragraph("📅 Date Range: <b>All Time</b>", styles['Normal']))
+            story.append(Paragraph("📅 Date Range: <b>All Time</b>", styles['normal']))
     
     story.append(Spacer(1, 30))
     
     # Products section
-    story.append(Paragraph("📦 PRODUCTS SUMMARY", heading_style))
+    story.append(Paragraph("📦 PRODUCTS SUMMARY", styles['heading']))
     
     product_data = [['Product Name', 'Category', 'Stock', 'Min Stock', 'Status', 'Unit Value', 'Total Value']]
     
-    query = Product.query
+    summary_query = db.session.query(
+        func.count(Product.id),
+        func.count().filter(Product.critical_stock),
+        func.coalesce(func.sum(Product.stock * Product.price), 0)
+    )
+    row_query = db.session.query(
+        Product.name.label('name'),
+        Category.name.label('category'),
+        Product.stock,
+        Product.min_stock,
+        Product.price
+    ).outerjoin(Product.categorie)
     if category_id:
-        query = query.filter_by(category_id=category_id)
-    
-    total_products = 0
-    total_value = 0
-    critical_count = 0
-    
-    for product in query.all():
-        status = '⚠️ Critical' if product.critical_stock else '✅ Normal'
-        if product.critical_stock:
-            critical_count += 1
-        unit_value = f"${product.price:.2f}"
-        product_total_value = product.stock * product.price
-        total_value += product_total_value
-        total_products += 1
-        
-        product_data.append([
-            product.name,
-            product.categorie.name,
-            str(product.stock),
-            str(product.min_stock),
-            status,
-            unit_value,
-            f"${product_total_value:.2f}"
-        ])
+        summary_query = summary_query.filter(Product.category_id == category_id)
+        row_query = row_query.filter(Product.category_id == category_id)
+
+    total_products, critical_count, total_value = summary_query.one()
+
+    # Format the detail rows column-wise with pandas, one chunk at a time.
+    # Nullable integer dtypes keep stock numbers from being read as floats when a row has NULLs
+    chunks = pd.read_sql(
+        row_query.order_by(Product.id).statement, db.session.connection(), chunksize=500,
+        dtype={'stock': 'Int64', 'min_stock': 'Int64'}
+    )
+    for frame in chunks:
+        # NULL stock compares and sums like it does in SQL: not critical, no value
+        critical = (frame['stock'] <= frame['min_stock']).fillna(False).astype(bool)
+        frame = frame.assign(
+            category=frame['category'].fillna(NO_CATEGORY_LABEL),
+            status=critical.map({True: '⚠️ Critical', False: '✅ Normal'}),
+            price=frame['price'].map('${:.2f}'.format),
+            total_value=(frame['stock'] * frame['price']).fillna(0).map('${:.2f}'.format),
+            stock=frame['stock'].astype(str).replace('<NA>', 'None'),
+            min_stock=frame['min_stock'].astype(str).replace('<NA>', 'None')
+        )
+        product_data.extend(
+            frame[['name', 'category', 'stock', 'min_stock', 'status', 'price', 'total_value']].values.tolist()
+        )
     
     # Summary row
     product_data.append([
@@ -777,75 +1178,65 @@ def export_pdf():
     ])
     
     if len(product_data) > 2:  # More than just header and summary
-        product_table = Table(product_data, colWidths=[2*inch, 1.3*inch, 0.7*inch, 0.7*inch, 1*inch, 0.8*inch, 1*inch])
-        product_table.setStyle(TableStyle([
-            # Header
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            
-            # Data rows
-            ('BACKGROUND', (0, 1), (-1, -2), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -2), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -2), 9),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lightgrey]),
-            
-            # Summary row
-            ('BACKGROUND', (0, -1), (-1, -1), colors.darkgreen),
-            ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 10)
-        ]))
+        product_table = _pdf_table(product_data, [2, 1.3, 0.7, 0.7, 1, 0.8, 1], 'report_products', repeat_rows=1)
         
         story.append(product_table)
     else:
-        story.append(Paragraph("No products found matching the criteria.", styles['Normal']))
+        story.append(Paragraph("No products found matching the criteria.", styles['normal']))
     
     # Stock movements section
     if start and end:
         story.append(Spacer(1, 30))
-        story.append(Paragraph("📋 STOCK MOVEMENTS", heading_style))
-        
-        movement_query = StockMovement.query.filter(
-            StockMovement.date >= start,
-            StockMovement.date <= end
-        )
+        story.append(Paragraph("📋 STOCK MOVEMENTS", styles['heading']))
         
+        movement_filters = [StockMovement.date >= start, StockMovement.date <= end]
         if category_id:
-            movement_query = movement_query.join(Product).filter(Product.category_id == category_id)
-        
-        movements = movement_query.order_by(StockMovement.date.desc()).all()
-        
-        if movements:
+            movement_filters.append(Product.category_id == category_id)
+
+        totals = dict(
+            db.session.query(StockMovement.type, func.sum(StockMovement.amount))
+            .join(StockMovement.product)
+            .filter(*movement_filters)
+            .group_by(StockMovement.type)
+            .all()
+        )
+        total_inflow = totals.get('inflow', 0)
+        total_outflow = totals.get('outflow', 0)
+        movement_count = db.session.query(func.count(StockMovement.id)) \
+            .join(StockMovement.product).filter(*movement_filters).scalar()
+
+        if movement_count:
             movement_data = [['Date', 'Product', 'Type', 'Amount', 'Previous', 'New Stock', 'Description']]
-            
-            total_inflow = 0
-            total_outflow = 0
-            
-            for movement in movements:
-                if movement.type == 'inflow':
-                    total_inflow += movement.amount
-                    type_display = '📈 Inflow'
-                else:
-                    total_outflow += movement.amount
-                    type_display = '📉 Outflow'
-                
-                movement_data.append([
-                    movement.date.strftime('%Y-%m-%d'),
-                    movement.product.name,
-                    type_display,
-                    str(movement.amount),
-                    str(movement.previous_stock),
-                    str(movement.new_stock),
-                    movement.description[:25] + '...' if movement.description and len(movement.description) > 25 else (movement.description or 'N/A')
-                ])
+
+            movement_query = db.session.query(
+                StockMovement.date, Product.name.label('product'), StockMovement.type, StockMovement.amount,
+                StockMovement.previous_stock, StockMovement.new_stock, StockMovement.description
+            ).join(StockMovement.product).filter(*movement_filters).order_by(StockMovement.date.desc())
+
+            # Same column-wise formatting as the product rows
+            # Nullable integer dtypes keep stock numbers from being read as floats when a row has NULLs
+            chunks = pd.read_sql(
+                movement_query.statement, db.session.connection(), chunksize=500, parse_dates=['date'],
+                dtype={'amount': 'Int64', 'previous_stock': 'Int64', 'new_stock': 'Int64'}
+            )
+            for frame in chunks:
+                description = frame['description'].fillna('')
+                description = description.where(description.str.len() <= 25, description.str[:25] + '...')
+                frame = frame.assign(
+                    date=frame['date'].dt.strftime('%Y-%m-%d'),
+                    type=frame['type'].map(PDF_MOVEMENT_LABELS).fillna(PDF_MOVEMENT_LABELS['outflow']),
+                    amount=frame['amount'].astype(str),
+                    previous_stock=frame['previous_stock'].astype(str).replace('<NA>', 'None'),
+                    new_stock=frame['new_stock'].astype(str).replace('<NA>', 'None'),
+                    description=description.mask(description == '', 'N/A')
+                )
+                movement_data.extend(
+                    frame[['date', 'product', 'type', 'amount', 'previous_stock', 'new_stock', 'description']].values.tolist()
+                )
             
             # Summary row for movements
             movement_data.append([
-                f'SUMMARY ({len(movements)} movements)',
+                f'SUMMARY ({movement_count} movements)',
                 f'Inflow: {total_inflow}',
                 f'Outflow: {total_outflow}',
                 f'Net: {total_inflow - total_outflow}',
@@ -854,271 +1245,172 @@ def export_pdf():
                 f"Period: {start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}"
             ])
             
-            movement_table = Table(movement_data, colWidths=[1*inch, 1.5*inch, 0.8*inch, 0.6*inch, 0.6*inch, 0.6*inch, 1.4*inch])
-            movement_table.setStyle(TableStyle([
-                # Header
-                ('BACKGROUND', (0, 0), (-1, 0), colors.purple),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                
-                # Data rows
-                ('BACKGROUND', (0, 1), (-1, -2), colors.lavender),
-                ('GRID', (0, 0), (-1, -2), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -2), 8),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lavender]),
-                
-                # Summary row
-                ('BACKGROUND', (0, -1), (-1, -1), colors.darkred),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, -1), (-1, -1), 9)
-            ]))
+            movement_table = _pdf_table(movement_data, [1, 1.5, 0.8, 0.6, 0.6, 0.6, 1.4], 'report_movements', repeat_rows=1)
             
             story.append(movement_table)
         else:
-            story.append(Paragraph("No stock movements found in the specified date range.", styles['Normal']))
+            story.append(Paragraph("No stock movements found in the specified date range.", styles['normal']))
     
     # Footer
     story.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        alignment=1,
-        textColor=colors.grey
-    )
-    story.append(Paragraph("Generated by Stock Tracking System | Detailed Report", footer_style))
+    story.append(Paragraph("Generated by Stock Tracking System | Detailed Report", styles['footer']))
     
-    # Build PDF
-    doc.build(story)
-    output.seek(0)
-    
-    filename = f"stock_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    
-    return send_file(
-        output,
-        download_name=filename,
-        as_attachment=True,
-        mimetype='application/pdf'
-    )
+    filename = _export_filename('stock_report', 'pdf', generated_at)
+    return _send_pdf(story, filename)
 
-@app.route('/dashboard/export/pdf')
-def export_dashboard_pdf():
-    """Export dashboard summary to PDF"""
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from reportlab.graphics.shapes import Drawing
-    from reportlab.graphics.charts.piecharts import Pie
-    from reportlab.graphics.charts.barcharts import VerticalBarChart
-    from datetime import datetime, timedelta
-    
-    # Get dashboard data
-    products = Product.query.all()
-    categories = Category.query.all()
-    movements = StockMovement.query.filter(
-        StockMovement.date >= datetime.now() - timedelta(days=30)
-    ).all()
-    
-    # Calculate statistics
-    total_products = len(products)
-    critical_products = len([p for p in products if p.critical_stock])
-    total_value = sum(p.stock * p.price for p in products)
-    total_inflow = sum(m.amount for m in movements if m.type == 'inflow')
-    total_outflow = sum(m.amount for m in movements if m.type == 'outflow')
+@cache.memoize(timeout=300)
+def _dashboard_pdf(version, category_version):
+    """Render the dashboard PDF for one data version.
+
+    Keyed on _dashboard_version and _category_version. Returns
+    ``(generated_at, pdf_bytes)``; the category routes also clear it with
+    ``delete_memoized``.
+    """
+    from reportlab.platypus import Paragraph, Spacer
+
+    generated_at = datetime.now()
+    cutoff = generated_at - RECENT_WINDOW
+    
+    # Calculate statistics in the database
+    total_products, critical_products, total_value, total_categories = db.session.query(
+        func.count(Product.id),
+        func.count(Product.id).filter(Product.critical_stock),
+        func.coalesce(func.sum(Product.stock * Product.price), 0),
+        select(func.count(Category.id)).scalar_subquery()
+    ).one()
+    
+    movement_totals = dict(
+        db.session.query(StockMovement.type, func.sum(StockMovement.amount))
+        .filter(StockMovement.date >= cutoff)
+        .group_by(StockMovement.type)
+        .all()
+    )
+    total_inflow = movement_totals.get('inflow', 0)
+    total_outflow = movement_totals.get('outflow', 0)
     
     # Create PDF
-    output = BytesIO()
-    doc = SimpleDocTemplate(output, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
+    styles = _pdf_styles()
     story = []
     
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=26,
-        spaceAfter=30,
-        alignment=1,
-        textColor=colors.darkblue
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=15,
-        spaceBefore=20,
-        textColor=colors.darkblue,
-        borderWidth=1,
-        borderColor=colors.darkblue,
-        borderPadding=5,
-        backColor=colors.lightblue
-    )
-    
     # Header
-    story.append(Paragraph("📊 STOCK TRACKING DASHBOARD REPORT", title_style))
-    story.append(Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y at %H:%M:%S')}", styles['Normal']))
+    story.append(Paragraph("📊 STOCK TRACKING DASHBOARD REPORT", styles['title']))
+    story.append(Paragraph(f"Generated on: {generated_at.strftime('%B %d, %Y at %H:%M:%S')}", styles['normal']))
     story.append(Spacer(1, 30))
     
     # Summary Statistics Section
-    story.append(Paragraph("📈 SUMMARY STATISTICS", heading_style))
+    story.append(Paragraph("📈 SUMMARY STATISTICS", styles['heading']))
     
     summary_data = [
         ['Metric', 'Value', 'Status'],
         ['Total Products', str(total_products), '✅ Active'],
         ['Critical Stock Items', str(critical_products), '⚠️ Attention Needed' if critical_products > 0 else '✅ All Good'],
-        ['Total Categories', str(len(categories)), '📁 Organized'],
+        ['Total Categories', str(total_categories), '📁 Organized'],
         ['Total Stock Value', f'${total_value:,.2f}', '💰 Asset Value'],
         ['Inflow (30 days)', str(total_inflow), '📈 Received'],
         ['Outflow (30 days)', str(total_outflow), '📉 Consumed'],
         ['Net Movement', str(total_inflow - total_outflow), '⚖️ Balance']
     ]
     
-    summary_table = Table(summary_data, colWidths=[2.5*inch, 1.5*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-    ]))
+    summary_table = _pdf_table(summary_data, [2.5, 1.5, 2], 'dashboard_summary')
     
     story.append(summary_table)
     story.append(Spacer(1, 20))
     
     # Critical Stock Items
     if critical_products > 0:
-        story.append(Paragraph("⚠️ CRITICAL STOCK ALERTS", heading_style))
+        story.append(Paragraph("⚠️ CRITICAL STOCK ALERTS", styles['heading']))
         
         critical_data = [['Product Name', 'Category', 'Current Stock', 'Min Required', 'Action Needed']]
-        for product in products:
-            if product.critical_stock:
-                critical_data.append([
-                    product.name,
-                    product.categorie.name,
-                    str(product.stock),
-                    str(product.min_stock),
-                    'RESTOCK IMMEDIATELY'
-                ])
+        critical_rows = db.session.query(
+            Product.name, Category.name, Product.stock, Product.min_stock
+        ).outerjoin(Product.categorie).filter(Product.critical_stock).order_by(Product.id).limit(PDF_CRITICAL_LIMIT)
+        for name, category_name, stock, min_stock in critical_rows:
+            critical_data.append([
+                name,
+                category_name or NO_CATEGORY_LABEL,
+                str(stock),
+                str(min_stock),
+                'RESTOCK IMMEDIATELY'
+            ])
+        hidden_count = critical_products - (len(critical_data) - 1)
+        if hidden_count > 0:
+            critical_data.append([f'... and {hidden_count} more', '', '', '', ''])
         
-        critical_table = Table(critical_data, colWidths=[2*inch, 1.5*inch, 1*inch, 1*inch, 1.5*inch])
-        critical_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.red),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.mistyrose),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 9)
-        ]))
+        critical_table = _pdf_table(critical_data, [2, 1.5, 1, 1, 1.5], 'dashboard_critical')
         
         story.append(critical_table)
         story.append(Spacer(1, 20))
     
     # Category Breakdown
-    story.append(Paragraph("📁 CATEGORY BREAKDOWN", heading_style))
+    story.append(Paragraph("📁 CATEGORY BREAKDOWN", styles['heading']))
     
     category_data = [['Category', 'Products Count', 'Total Value', 'Avg Value per Product']]
-    for category in categories:
-        products_count = len(category.products)
-        if products_count > 0:
-            category_value = sum(p.stock * p.price for p in category.products)
-            avg_value = category_value / products_count
-            category_data.append([
-                category.name,
-                str(products_count),
-                f'${category_value:,.2f}',
-                f'${avg_value:,.2f}'
-            ])
+    # Inner join: categories without products are left out
+    category_rows = db.session.query(
+        Category.name,
+        func.count(Product.id),
+        func.sum(Product.stock * Product.price)
+    ).join(Product).group_by(Category.id).order_by(Category.id)
+    for name, products_count, category_value in category_rows:
+        category_data.append([
+            name,
+            str(products_count),
+            f'${category_value:,.2f}',
+            f'${category_value / products_count:,.2f}'
+        ])
     
-    category_table = Table(category_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-    category_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgreen])
-    ]))
+    category_table = _pdf_table(category_data, [2, 1.5, 1.5, 1.5], 'dashboard_categories')
     
     story.append(category_table)
     story.append(Spacer(1, 20))
     
     # Recent Stock Movements (Last 10)
-    story.append(Paragraph("📋 RECENT STOCK MOVEMENTS", heading_style))
-    
-    recent_movements = movements[-10:] if len(movements) > 10 else movements
+    story.append(Paragraph("📋 RECENT STOCK MOVEMENTS", styles['heading']))
+    
+    recent_movements = db.session.query(
+        StockMovement.date,
+        Product.name,
+        StockMovement.type,
+        StockMovement.amount,
+        StockMovement.description
+    ).join(StockMovement.product).filter(
+        StockMovement.date >= cutoff
+    ).order_by(StockMovement.date.desc()).limit(10)
     movement_data = [['Date', 'Product', 'Type', 'Amount', 'Description']]
     
-    for movement in reversed(recent_movements):
+    for moved_at, product_name, movement_type, amount, description in recent_movements:
         movement_data.append([
-            movement.date.strftime('%Y-%m-%d'),
-            movement.product.name,
-            f"{'📈' if movement.type == 'inflow' else '📉'} {movement.type.title()}",
-            str(movement.amount),
-            movement.description[:30] + '...' if movement.description and len(movement.description) > 30 else (movement.description or 'N/A')
+            moved_at.strftime('%Y-%m-%d'),
+            product_name,
+            PDF_MOVEMENT_LABELS.get(movement_type, PDF_MOVEMENT_LABELS['outflow']),
+            str(amount),
+            _pdf_description(description, 30)
         ])
     
     if len(movement_data) > 1:
-        movement_table = Table(movement_data, colWidths=[1.2*inch, 2*inch, 1.3*inch, 0.8*inch, 2.2*inch])
-        movement_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.purple),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lavender),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lavender])
-        ]))
+        movement_table = _pdf_table(movement_data, [1.2, 2, 1.3, 0.8, 2.2], 'dashboard_movements')
         
         story.append(movement_table)
     else:
-        story.append(Paragraph("No recent stock movements found.", styles['Normal']))
+        story.append(Paragraph("No recent stock movements found.", styles['normal']))
     
     # Footer
     story.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        alignment=1,
-        textColor=colors.grey
-    )
-    story.append(Paragraph("Generated by Stock Tracking System | Dashboard Report", footer_style))
+    story.append(Paragraph("Generated by Stock Tracking System | Dashboard Report", styles['footer']))
     
-    # Build PDF
-    doc.build(story)
-    output.seek(0)
-    
-    filename = f"dashboard_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    
-    return send_file(
-        output,
-        download_name=filename,
-        as_attachment=True,
-        mimetype='application/pdf'
-    )
+    output = BytesIO()
+    _build_pdf(story, output)
+    return generated_at, output.getvalue()
+
+@app.route('/dashboard/export/pdf')
+def export_dashboard_pdf():
+    """Export dashboard summary to PDF"""
+    generated_at, pdf = _dashboard_pdf(_dashboard_version(), _category_version())
+    filename = _export_filename('dashboard_report', 'pdf', generated_at)
+    return _send_download(BytesIO(pdf), filename, 'application/pdf')
 
 if __name__ == '__main__':
+    with app.app_context():
+        init_db()
     app.run(debug=True, host='127.0.0.1', port=5000)
     
\ No newline at end of file
@@ -3,13 +3,15 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+_TRUTHY = frozenset({'1', 'true', 't', 'yes', 'y'})
+
 
 def _get_bool_env(name: str, default: bool = False) -> bool:
     """Return boolean environment variables in a safe way."""
     value = os.getenv(name)
     if value is None:
         return default
-    return value.lower() in {'1', 'true', 't', 'yes', 'y'}
+    return value.lower() in _TRUTHY
 
 
 class Config:
@@ -25,4 +27,9 @@ class Config:
     REMEMBER_COOKIE_SECURE = _get_bool_env('REMEMBER_COOKIE_SECURE', False)
 
     # CSRF configuration
-    WTF_CSRF_TIME_LIMIT = int(os.getenv('WTF_CSRF_TIME_LIMIT', 3600))
\ No newline at end of file
+    WTF_CSRF_TIME_LIMIT = int(os.getenv('WTF_CSRF_TIME_LIMIT', 3600))
+
+    # Cache configuration (e.g. CACHE_TYPE=RedisCache with CACHE_REDIS_URL in production)
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'SimpleCache')
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', 300))
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
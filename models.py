@@ -1,4 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, table, column
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import configure_mappers
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -35,7 +38,8 @@ class Product(db.Model):
     movements = db.relationship('StockMovement', backref='product', lazy=True)
     
     # Property decaratoru ile fonkisyonu değişken gibi kullanabiliriz.
-    @property
+    # Hybrid olduğu için Product.critical_stock SQL filtrelerinde de kullanılabilir.
+    @hybrid_property
     def critical_stock(self):
         """Are the stocks at a critical level?"""
         return self.stock <= self.min_stock
@@ -57,4 +61,69 @@ class StockMovement(db.Model):
     date = db.Column(db.DateTime, default=datetime.now)
     
     def __repr__(self):
-        return f'<StokMovement {self.type} - {self.amount}>'
\ No newline at end of file
+        return f'<StokMovement {self.type} - {self.amount}>'
+
+# Create the backref attributes (Product.categorie, StockMovement.product)
+# at import time so queries can join on them before any ORM use
+configure_mappers()
+
+# Indexes backing the filters used by the dashboard, reports and analytics.
+# Date range scans that join products read product_id from the index, and
+# the per-type movement totals are answered from (type, date). The "last 10
+# movements" queries walk ix_movement_date_product backwards for
+# ORDER BY date DESC LIMIT 10, so no separate descending date index is needed.
+db.Index('ix_movement_date_product', StockMovement.date, StockMovement.product_id)
+db.Index('ix_movement_product_date', StockMovement.product_id, StockMovement.date.desc())
+db.Index('ix_movement_type_date', StockMovement.type, StockMovement.date)
+# Lets max(updated_at) in the cache version checks read one index entry
+db.Index('ix_product_updated_at', Product.updated_at)
+# Covers category filters together with the critical_stock check
+db.Index('ix_product_category_stock', Product.category_id, Product.stock, Product.min_stock)
+# Partial index: only products at a critical stock level are indexed
+db.Index(
+    'ix_product_critical',
+    Product.id,
+    postgresql_where=Product.critical_stock,
+    sqlite_where=Product.critical_stock
+)
+
+# Full-text index over product names. SQLite uses an external-content FTS5
+# table with the trigram tokenizer so substring searches are index-backed;
+# triggers keep it in sync with the products table.
+product_fts = table('product_fts', column('rowid'), column('name'))
+
+_PRODUCT_FTS_DDL = (
+    "CREATE VIRTUAL TABLE product_fts USING fts5("
+    "name, content='products', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER product_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER product_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER product_fts_au AFTER UPDATE OF name ON products BEGIN "
+    "INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name); END",
+    "INSERT INTO product_fts(product_fts) VALUES ('rebuild')",
+)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_product_search_index(target, connection, **kw):
+    """Create the product name search index for the connected database."""
+    if connection.dialect.name == 'sqlite':
+        if not inspect(connection).has_table('product_fts'):
+            for statement in _PRODUCT_FTS_DDL:
+                connection.exec_driver_sql(statement)
+    elif connection.dialect.name == 'postgresql':
+        # A trigram GIN index lets PostgreSQL serve '%term%' LIKE filters
+        connection.exec_driver_sql('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        connection.exec_driver_sql(
+            'CREATE INDEX IF NOT EXISTS ix_product_name_trgm '
+            'ON products USING gin (name gin_trgm_ops)'
+        )
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_product_search_index(target, connection, **kw):
+    """Drop the SQLite FTS table, which is not part of the mapped metadata."""
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DROP TABLE IF EXISTS product_fts')
@@ -1,11 +1,50 @@
 """
 Test configuration file for Flask Stock Tracking System
 """
+import contextlib
 import os
+import shutil
 import tempfile
 import pytest
-from app import app, db
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+# The engine is created when app is imported, so point it at the test
+# database first instead of the development database in instance/. Each
+# xdist worker gets its own throwaway SQLite file; unlike a single
+# in-memory connection it can be opened from several threads at once.
+# Where /dev/shm exists the file lives in RAM, so it never touches disk.
+XDIST_WORKER = os.environ.get('PYTEST_XDIST_WORKER', 'gw0')
+TEST_DATABASE_DIR = tempfile.mkdtemp(
+    prefix=f'stok_test_{XDIST_WORKER}_',
+    dir='/dev/shm' if os.path.isdir('/dev/shm') else None
+)
+os.environ['DATABASE_URL'] = os.environ.get(
+    'TEST_DATABASE_URL',
+    'sqlite:///' + os.path.join(TEST_DATABASE_DIR, 'stok.db')
+)
+
+# Engine options are read at import time as well. The suite runs many
+# distinct statements, so the compiled-statement cache is enlarged, and the
+# pool keeps enough connections for test_concurrent_requests. Pool sizing
+# does not apply to in-memory SQLite, which uses a single static connection.
+TEST_POOL_SIZE = 10
+
+from config import Config
+Config.SQLALCHEMY_ENGINE_OPTIONS = {'query_cache_size': 1200}
+if ':memory:' not in os.environ['DATABASE_URL']:
+    Config.SQLALCHEMY_ENGINE_OPTIONS['pool_size'] = TEST_POOL_SIZE
+
+from jinja2 import FileSystemBytecodeCache
+
+from app import app, db, cache
 from models import Product, Category, StockMovement
+from helpers import app_ctx_id, configure_sqlite, count_queries
+
+# Keep compiled templates between runs, so later runs skip parsing them
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JINJA_CACHE_DIR = os.path.join(PROJECT_ROOT, '.jinja_cache')
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
 
 
 class TestConfig:
@@ -17,29 +56,37 @@ class TestConfig:
     WTF_CSRF_ENABLED = False
 
 
-@pytest.fixture
-def client():
-    """Create test client"""
-    app.config.from_object(TestConfig)
-    
-    with app.test_client() as client:
-        with app.app_context():
-            db.create_all()
-            yield client
-            db.drop_all()
+def _warm_pool(engine):
+    """Open the pooled connections up front so tests do not pay for it"""
+    if 'pool_size' not in Config.SQLALCHEMY_ENGINE_OPTIONS:
+        return
+    connections = [engine.connect() for _ in range(TEST_POOL_SIZE)]
+    for connection in connections:
+        connection.close()
 
 
-@pytest.fixture
-def init_database():
-    """Initialize database with test data"""
+@pytest.fixture(scope='session')
+def database():
+    """Create the schema and the shared test rows once per test session.
+    
+    Returns the primary keys of the seeded rows; init_database loads them
+    into each test's session.
+    """
+    app.config.from_object(TestConfig)
+    
     with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            configure_sqlite(db.engine)
+        _warm_pool(db.engine)
+        db.create_all()
+        
         # Create test categories
         category1 = Category(name='Electronics', description='Electronic products')
         category2 = Category(name='Clothing', description='Clothing items')
         category3 = Category(name='Books', description='Books and literature')
         
         db.session.add_all([category1, category2, category3])
-        db.session.commit()
+        db.session.flush()
         
         # Create test products
         product1 = Product(
@@ -69,7 +116,7 @@ def init_database():
         )
         
         db.session.add_all([product1, product2, product3])
-        db.session.commit()
+        db.session.flush()
         
         # Create test stock movements
         movement1 = StockMovement(
@@ -93,11 +140,173 @@ def init_database():
         db.session.add_all([movement1, movement2])
         db.session.commit()
         
-        return {
-            'categories': [category1, category2, category3],
-            'products': [product1, product2, product3],
-            'movements': [movement1, movement2]
+        seeded = {
+            'categories': (Category, [category1.id, category2.id, category3.id]),
+            'products': (Product, [product1.id, product2.id, product3.id]),
+            'movements': (StockMovement, [movement1.id, movement2.id])
         }
+        db.session.remove()
+    
+    return seeded
+
+
+@pytest.fixture(scope='module', autouse=True)
+def query_budget(request):
+    """Fail a module marked ``query_budget(n)`` that runs n or more queries.
+    
+    A cheap net for N+1 regressions that no single test asserts on.
+    """
+    marker = request.node.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+    
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine) as queries:
+        yield
+    budget = marker.args[0]
+    assert len(queries) < budget, f'{len(queries)} queries, budget is {budget}'
+
+
+@pytest.fixture(scope='session')
+def seed_ids(database):
+    """Primary keys of the seeded rows, by table, in seeding order.
+    
+    For tests that only need ids; unlike init_database it runs no queries.
+    """
+    return {name: ids for name, (model, ids) in database.items()}
+
+
+@pytest.fixture(scope='session')
+def electronics_category_id(seed_ids):
+    """Primary key of the seeded Electronics category.
+    
+    The id rather than the object, so it can be used in any session.
+    """
+    return seed_ids['categories'][0]
+
+
+def pytest_addoption(parser):
+    parser.addoption('--slow', action='store_true', help='also run tests marked slow')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'no_transaction: use the app session instead of the rolled-back test '
+        'transaction; for read-only tests that query from several threads'
+    )
+    config.addinivalue_line('markers', 'slow: skipped unless pytest runs with --slow')
+    config.addinivalue_line(
+        'markers',
+        'query_budget(n): fail the module if its tests run n or more SQL queries'
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip slow tests unless --slow is given"""
+    if config.getoption('--slow'):
+        return
+    skip_slow = pytest.mark.skip(reason='needs --slow')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
+
+
+def pytest_unconfigure(config):
+    """Close the engine and delete this worker's database directory"""
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(TEST_DATABASE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='module')
+def module_connection(database):
+    """Connection whose transaction is rolled back after the test module.
+    
+    Module-scoped seed fixtures write through this connection, so their
+    rows are shared by the module's tests and never committed.
+    """
+    with app.app_context():
+        connection = db.engine.connect()
+    transaction = connection.begin()
+    
+    yield connection
+    
+    transaction.rollback()
+    connection.close()
+
+
+@contextlib.contextmanager
+def _savepoint_session(connection):
+    """Swap db.session for one that works inside a rolled-back SAVEPOINT.
+    
+    The session joins it with create_savepoint, so commits made by the test
+    or by the views only release nested SAVEPOINTs.
+    """
+    savepoint = connection.begin_nested()
+    app_session = db.session
+    db.session = scoped_session(
+        sessionmaker(bind=connection, join_transaction_mode='create_savepoint'),
+        scopefunc=app_ctx_id
+    )
+    try:
+        yield db.session
+    finally:
+        # Popping the app context already removed the swapped session
+        db.session = app_session
+        savepoint.rollback()
+
+
+@pytest.fixture
+def db_session(request, module_connection):
+    """Run the test inside a SAVEPOINT that is rolled back afterwards"""
+    if request.node.get_closest_marker('no_transaction'):
+        yield db.session
+        return
+    
+    with _savepoint_session(module_connection) as session:
+        yield session
+
+
+@pytest.fixture
+def client(db_session):
+    """Create test client"""
+    with app.test_client() as client:
+        with app.app_context():
+            cache.clear()
+            yield client
+
+
+EXPORT_URLS = {
+    'dashboard_pdf': '/dashboard/export/pdf',
+    'products_excel': '/products/export/excel',
+    'reports_excel': '/reports/export/excel?start_date=2023-01-01&end_date=2023-12-31',
+    'reports_pdf': '/reports/export/pdf?start_date=2023-01-01&end_date=2023-12-31'
+}
+
+
+@pytest.fixture(scope='module')
+def export_responses(module_connection):
+    """Each export in EXPORT_URLS rendered once from the seed data.
+    
+    For tests that only check the status and headers of an export; tests
+    that change data first must request the export themselves.
+    """
+    with _savepoint_session(module_connection), app.test_client() as client:
+        with app.app_context():
+            cache.clear()
+            return {name: client.get(url, buffered=True) for name, url in EXPORT_URLS.items()}
+
+
+@pytest.fixture
+def init_database(client, database):
+    """Load the shared test rows into the current test's session"""
+    return {
+        name: [db.session.get(model, pk) for pk in ids]
+        for name, (model, ids) in database.items()
+    }
 
 
 @pytest.fixture
@@ -0,0 +1,61 @@
+"""
+Shared helpers for the test suites
+"""
+import contextlib
+
+from flask import globals as flask_globals
+from sqlalchemy import event
+
+
+def app_ctx_id():
+    """Scope test sessions to the app context, like Flask-SQLAlchemy does."""
+    return id(flask_globals.app_ctx._get_current_object())
+
+
+def _prepare_connection(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    # journal_mode/synchronous only matter when the test database is a file.
+    # WAL lets other connections read while the module transaction is open.
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=OFF')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.close()
+
+
+def _emit_begin(connection):
+    connection.exec_driver_sql('BEGIN')
+
+
+def configure_sqlite(engine):
+    """Tune the SQLite test engine; safe to call more than once.
+
+    pysqlite begins transactions on its own and does not nest SAVEPOINTs in
+    them, so BEGIN is emitted explicitly (see the SQLAlchemy SQLite docs).
+    Test data is throwaway, so a file database also skips fsyncs.
+    """
+    if event.contains(engine, 'begin', _emit_begin):
+        return
+    event.listen(engine, 'connect', _prepare_connection)
+    event.listen(engine, 'begin', _emit_begin)
+
+
+def flashed_messages(client):
+    """Messages flashed to the client's session that no page has shown yet"""
+    with client.session_transaction() as session:
+        return [message for _, message in session.get('_flashes', [])]
+
+
+@contextlib.contextmanager
+def count_queries(conn):
+    """Collect the SQL statements executed on a connection or engine"""
+    queries = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(conn, 'before_cursor_execute', before)
+    try:
+        yield queries
+    finally:
+        event.remove(conn, 'before_cursor_execute', before)
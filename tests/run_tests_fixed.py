@@ -1,161 +1,352 @@
 """
 Fixed Test runner script for Flask Stock Tracking System
+Set TEST_DATABASE_URL to run against another database than throwaway SQLite
 """
 import os
+import subprocess
 import sys
+import importlib.util
 import unittest
 from datetime import datetime
+import pytest
+from sqlalchemy.orm import scoped_session, sessionmaker
 
 # Add project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-# Ensure tests use isolated database
-TEST_DB_PATH = os.path.join(project_root, 'test_unit.sqlite')
-os.environ['DATABASE_URL'] = f'sqlite:///{TEST_DB_PATH}'
+# The engine is created when app is imported, so point it at the test
+# database first instead of the development database in instance/
+TEST_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+os.environ['DATABASE_URL'] = TEST_DATABASE_URI
+
+# Import models after path setup; the app itself is loaded by _load_app()
+from models import db, Product, Category, StockMovement
+from helpers import app_ctx_id, configure_sqlite
+
+app = cache = None
 
-# Import after path setup
-from app import app, db
-from models import Product, Category, StockMovement
 
 class TestConfig:
     """Test configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = f'sqlite:///{TEST_DB_PATH}'
+    SQLALCHEMY_DATABASE_URI = TEST_DATABASE_URI
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = 'test-secret-key'
     WTF_CSRF_ENABLED = False
 
+
+def _load_app():
+    """Import the Flask app on first use.
+
+    Running this file only launches pytest, so the launcher process never
+    pays for importing Flask, pandas and reportlab.
+    """
+    global app, cache
+    if app is not None:
+        return
+    from app import app as flask_app, cache as flask_cache
+    app, cache = flask_app, flask_cache
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            configure_sqlite(db.engine)
+
+
 class BaseTestCase(unittest.TestCase):
-    """Base test case with setup and teardown"""
+    """Base test case: test data is created once per class inside a
+    transaction that is rolled back afterwards, and each test runs in a
+    SAVEPOINT of that transaction"""
     
-    def setUp(self):
-        """Set up test environment"""
-        # Configure test app
+    @classmethod
+    def setUpClass(cls):
+        """Create the test client, tables (first class only) and test data once for the class"""
+        _load_app()
         app.config.from_object(TestConfig)
+        cls.app = app.test_client()
+        cls.app_context = app.app_context()
+        cls.app_context.push()
+        db.create_all()
         
-        self.app = app.test_client()
-        self.app_context = app.app_context()
-        self.app_context.push()
+        # The pytest suite may share this database, so its rows are only
+        # hidden inside the class transaction, never deleted for real
+        cls.connection = db.engine.connect()
+        cls.transaction = cls.connection.begin()
+        for table in reversed(db.metadata.sorted_tables):
+            cls.connection.execute(table.delete())
         
-        # Ensure clean schema for each test
-        db.drop_all()
-        # Create tables
-        db.create_all()
+        cls.app_session = db.session
+        db.session = scoped_session(
+            sessionmaker(bind=cls.connection, join_transaction_mode='create_savepoint'),
+            scopefunc=app_ctx_id
+        )
+        cls.create_test_data()
+        db.session.remove()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Roll back the class transaction, restoring the tables as they were"""
+        db.session.remove()
+        db.session = cls.app_session
+        cls.transaction.rollback()
+        cls.connection.close()
+        cls.app_context.pop()
+    
+    def setUp(self):
+        """Run the test inside a SAVEPOINT; its commits only release nested ones"""
+        cache.clear()
+        self.savepoint = self.connection.begin_nested()
         
-        # Create test data
-        self.create_test_data()
+        for name, (model, pk) in self.test_rows.items():
+            setattr(self, name, db.session.get(model, pk))
     
     def tearDown(self):
-        """Clean up after tests"""
+        """Roll back everything the test wrote"""
         db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
-    
-    def create_test_data(self):
-        """Create test data"""
-        try:
-            # Create categories
-            self.category1 = Category(name='Test Electronics', description='Electronic products (test)')
-            self.category2 = Category(name='Test Clothing', description='Clothing items (test)')
-            
-            db.session.add_all([self.category1, self.category2])
-            db.session.commit()
-            
-            # Create products
-            self.product1 = Product(
-                name='Laptop',
-                barcode='TEST-LAP-001',
-                price=1000.0,
-                stock=10,
-                min_stock=5,
-                category_id=self.category1.id,
-            )
-            
-            self.product2 = Product(
-                name='T-Shirt',
-                barcode='TEST-TSH-001',
-                price=20.0,
-                stock=3,  # Critical stock
-                min_stock=10,
-                category_id=self.category2.id,
-            )
-            
-            db.session.add_all([self.product1, self.product2])
-            db.session.commit()
-            
-            # Create stock movements
-            self.movement1 = StockMovement(
-                product_id=self.product1.id,
-                type='inflow',
-                amount=5,
-                previous_stock=5,
-                new_stock=10,
-                description='Initial stock'
-            )
-            
-            db.session.add(self.movement1)
-            db.session.commit()
-            
-        except Exception as e:
-            db.session.rollback()
-            print(f"Error creating test data: {e}")
+        self.savepoint.rollback()
+    
+    @classmethod
+    def create_test_data(cls):
+        """Create test data with one multi-row INSERT per table"""
+        db.session.execute(Category.__table__.insert(), [
+            {'id': 1, 'name': 'Electronics', 'description': 'Electronic products'},
+            {'id': 2, 'name': 'Clothing', 'description': 'Clothing items'},
+            {'id': 3, 'name': 'Books', 'description': 'Books and literature'},
+        ])
+        db.session.execute(Product.__table__.insert(), [
+            {'id': 1, 'name': 'Laptop', 'barcode': '123456789', 'price': 999.99,
+             'stock': 15, 'min_stock': 5, 'category_id': 1},
+            # Critical stock
+            {'id': 2, 'name': 'T-Shirt', 'barcode': '987654321', 'price': 29.99,
+             'stock': 3, 'min_stock': 10, 'category_id': 2},
+            {'id': 3, 'name': 'Python Book', 'barcode': None, 'price': 49.99,
+             'stock': 25, 'min_stock': 5, 'category_id': 3},
+        ])
+        db.session.execute(StockMovement.__table__.insert(), [
+            {'id': 1, 'product_id': 1, 'type': 'inflow', 'amount': 10,
+             'previous_stock': 5, 'new_stock': 15, 'description': 'Initial stock'},
+            {'id': 2, 'product_id': 2, 'type': 'outflow', 'amount': 7,
+             'previous_stock': 10, 'new_stock': 3, 'description': 'Sales'},
+        ])
+        db.session.commit()
+        
+        # Attribute name -> (model, primary key); setUp loads these per test
+        cls.test_rows = {
+            'category1': (Category, 1),
+            'category2': (Category, 2),
+            'category3': (Category, 3),
+            'product1': (Product, 1),
+            'product2': (Product, 2),
+            'product3': (Product, 3),
+            'movement1': (StockMovement, 1),
+            'movement2': (StockMovement, 2),
+        }
+
 
 class TestModels(BaseTestCase):
     """Test database models"""
     
     def test_category_model(self):
         """Test Category model"""
-        category = Category.query.filter_by(name='Test Electronics').first()
-        self.assertIsNotNone(category)
-        self.assertEqual(category.name, 'Test Electronics')
-        self.assertEqual(category.description, 'Electronic products (test)')
+        category = self.category1
+        self.assertEqual(category.name, 'Electronics')
+        self.assertEqual(str(category), '<Category Electronics>')
+        self.assertTrue(len(category.products) > 0)
     
     def test_product_model(self):
         """Test Product model"""
-        product = Product.query.filter_by(barcode='TEST-LAP-001').first()
-        self.assertIsNotNone(product)
+        product = self.product1
         self.assertEqual(product.name, 'Laptop')
-        self.assertEqual(product.price, 1000.0)
-        self.assertEqual(product.stock, 10)
+        self.assertEqual(product.barcode, '123456789')
+        self.assertEqual(product.price, 999.99)
+        self.assertEqual(str(product), '<Product Laptop>')
+    
+    def test_critical_stock_property(self):
+        """Test critical stock property"""
+        # Normal stock
+        self.assertFalse(self.product1.critical_stock)  # stock: 15, min: 5
+        
+        # Critical stock
+        self.assertTrue(self.product2.critical_stock)   # stock: 3, min: 10
     
     def test_stock_movement_model(self):
         """Test StockMovement model"""
-        movement = StockMovement.query.filter_by(type='inflow').first()
-        self.assertIsNotNone(movement)
-        self.assertEqual(movement.amount, 5)
-        self.assertIsNotNone(movement.product_id)
+        movement = self.movement1
+        self.assertEqual(movement.type, 'inflow')
+        self.assertEqual(movement.amount, 10)
+        self.assertEqual(str(movement), '<StokMovement inflow - 10>')
+
+
+@pytest.fixture(scope='class')
+def seeded_client():
+    """Seed the test data once and share one client across a class of
+    read-only tests, so no per-test rollback is needed"""
+    BaseTestCase.setUpClass()
+    cache.clear()
+    yield BaseTestCase.app
+    BaseTestCase.tearDownClass()
 
-class TestRoutes(BaseTestCase):
+
+class TestRoutes:
     """Test Flask routes"""
     
-    def test_dashboard_route(self):
-        """Test dashboard route"""
-        response = self.app.get('/')
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Dashboard', response.data)
+    @pytest.mark.parametrize('path, status_code, expected', [
+        ('/', 200, [b'Dashboard']),
+        ('/products', 200, [b'Products', b'Laptop']),
+        ('/product/add', 200, [b'Add New Product']),
+        ('/categories', 200, [b'Categories', b'Electronics']),
+        ('/analytics', 200, [b'Analytics Dashboard']),
+        ('/reports', 200, [b'Reports']),
+        ('/nonexistent', 404, []),
+    ])
+    def test_route(self, seeded_client, path, status_code, expected):
+        """Test each page renders with its expected content"""
+        response = seeded_client.get(path)
+        assert response.status_code == status_code
+        for content in expected:
+            assert content in response.data
+
+
+class TestFunctionality(BaseTestCase):
+    """Test application functionality"""
     
-    def test_product_list_route(self):
-        """Test product list route"""
-        response = self.app.get('/products')
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Products', response.data)
+    def test_add_product(self):
+        """Test adding a new product"""
+        form_data = {
+            'name': 'New Product',
+            'barcode': '999888777',
+            'price': 99.99,
+            'stock': 50,
+            'min_stock': 10,
+            'category_id': self.category1.id
+        }
+        
+        response = self.app.post('/product/add', data=form_data)
+        self.assertEqual(response.status_code, 302)
+        
+        # Verify product was created
+        new_product = Product.query.filter_by(name='New Product').first()
+        self.assertIsNotNone(new_product)
+        self.assertEqual(new_product.barcode, '999888777')
     
-    def test_category_list_route(self):
-        """Test category list route"""
-        response = self.app.get('/categories')
+    def test_edit_product(self):
+        """Test editing a product"""
+        form_data = {
+            'name': 'Updated Laptop',
+            'barcode': self.product1.barcode,
+            'price': 1199.99,
+            'min_stock': 8,
+            'category_id': self.category1.id
+        }
+        
+        response = self.app.post(f'/product/edit/{self.product1.id}', 
+                               data=form_data)
+        self.assertEqual(response.status_code, 302)
+        
+        # Verify product was updated
+        db.session.expire(self.product1)
+        updated_product = self.product1
+        self.assertEqual(updated_product.name, 'Updated Laptop')
+        self.assertEqual(updated_product.price, 1199.99)
+    
+    def test_add_category(self):
+        """Test adding a new category"""
+        form_data = {
+            'name': 'New Category',
+            'description': 'This is a new category'
+        }
+        
+        response = self.app.post('/category/add', data=form_data)
+        self.assertEqual(response.status_code, 302)
+        
+        # Verify category was created
+        new_category = Category.query.filter_by(name='New Category').first()
+        self.assertIsNotNone(new_category)
+    
+    def test_stock_movement_inflow(self):
+        """Test stock inflow"""
+        original_stock = self.product1.stock
+        
+        form_data = {
+            'product_id': self.product1.id,
+            'type': 'inflow',
+            'amount': 25,
+            'description': 'New stock arrival'
+        }
+        
+        response = self.app.post('/stock-movement', data=form_data)
+        self.assertEqual(response.status_code, 302)
+        
+        # Verify stock was updated
+        db.session.expire(self.product1)
+        updated_product = self.product1
+        self.assertEqual(updated_product.stock, original_stock + 25)
+    
+    def test_stock_movement_outflow(self):
+        """Test stock outflow"""
+        original_stock = self.product1.stock
+        
+        form_data = {
+            'product_id': self.product1.id,
+            'type': 'outflow',
+            'amount': 5,
+            'description': 'Sales'
+        }
+        
+        response = self.app.post('/stock-movement', data=form_data)
+        self.assertEqual(response.status_code, 302)
+        
+        # Verify stock was updated
+        db.session.expire(self.product1)
+        updated_product = self.product1
+        self.assertEqual(updated_product.stock, original_stock - 5)
+    
+    def test_insufficient_stock_outflow(self):
+        """Test outflow with insufficient stock"""
+        form_data = {
+            'product_id': self.product2.id,  # T-Shirt with stock 3
+            'type': 'outflow',
+            'amount': 10,  # More than available
+            'description': 'Attempted sale'
+        }
+        
+        response = self.app.post('/stock-movement', data=form_data)
         self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Categories', response.data)
+        self.assertIn(b'Not enough stock', response.data)
+
+
+class TestExports:
+    """Test export functionality"""
+    
+    def test_product_excel_export(self, seeded_client):
+        """Test product Excel export"""
+        response = seeded_client.get('/products/export/excel')
+        assert response.status_code == 200
+        assert response.content_type == \
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    
+    def test_dashboard_pdf_export(self, seeded_client):
+        """Test dashboard PDF export"""
+        response = seeded_client.get('/dashboard/export/pdf')
+        assert response.status_code == 200
+        assert response.content_type == 'application/pdf'
+    
+    def test_reports_pdf_export(self, seeded_client):
+        """Test reports PDF export"""
+        response = seeded_client.get('/reports/export/pdf?start_date=2023-01-01&end_date=2023-12-31')
+        assert response.status_code == 200
+        assert response.content_type == 'application/pdf'
+
 
 class TestBasicFunctionality(BaseTestCase):
-    """Test basic CRUD functionality"""
+    """Test basic CRUD functionality; rows are only flushed, the per-test
+    rollback discards them"""
     
     def test_category_creation(self):
         """Test category creation"""
         category_count = Category.query.count()
         new_category = Category(name='Food', description='Food items')
         db.session.add(new_category)
-        db.session.commit()
+        db.session.flush()
         
         self.assertEqual(Category.query.count(), category_count + 1)
         self.assertIsNotNone(Category.query.filter_by(name='Food').first())
@@ -174,7 +365,7 @@ class TestBasicFunctionality(BaseTestCase):
         )
         
         db.session.add(new_product)
-        db.session.commit()
+        db.session.flush()
         
         self.assertEqual(Product.query.count(), product_count + 1)
     
@@ -192,54 +383,36 @@ class TestBasicFunctionality(BaseTestCase):
         )
         
         db.session.add(new_movement)
-        db.session.commit()
+        db.session.flush()
         
         self.assertEqual(StockMovement.query.count(), movement_count + 1)
 
-def run_basic_tests():
-    """Run a basic subset of tests"""
-    print("Running basic tests for Flask Stock Tracking System")
-    print("=" * 60)
-    
-    # Create test suite
-    loader = unittest.TestLoader()
-    suite = unittest.TestSuite()
-    
-    # Add test classes
-    suite.addTests(loader.loadTestsFromTestCase(TestModels))
-    suite.addTests(loader.loadTestsFromTestCase(TestRoutes))
-    suite.addTests(loader.loadTestsFromTestCase(TestBasicFunctionality))
-    
-    # Run tests
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # Print summary
-    print("\n" + "=" * 60)
-    print("TEST SUMMARY")
-    print("=" * 60)
-    print(f"Tests run: {result.testsRun}")
-    print(f"Failures: {len(result.failures)}")
-    print(f"Errors: {len(result.errors)}")
-    
-    if result.failures:
-        print("\nFAILURES:")
-        for test, traceback in result.failures:
-            print(f"- {test}: {traceback.split('AssertionError:')[-1].strip()}")
-    
-    if result.errors:
-        print("\nERRORS:")
-        for test, traceback in result.errors:
-            error_msg = traceback.split('\n')[-2] if '\n' in traceback else traceback
-            print(f"- {test}: {error_msg}")
-    
-    success_rate = ((result.testsRun - len(result.failures) - len(result.errors)) / result.testsRun) * 100
-    print(f"\nSuccess rate: {success_rate:.1f}%")
-    print(f"Test completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 60)
-    
-    return result.wasSuccessful()
+
+def run_tests(pytest_args=()):
+    """Run the tests with pytest, one worker per CPU core when pytest-xdist is installed.
+
+    Extra arguments go straight to pytest, e.g. `-k TestExports`.
+    """
+    print("=" * 70)
+    print("FLASK STOCK TRACKING SYSTEM - TEST SUITE")
+    print("=" * 70)
+    print(f"Starting tests at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print()
+    
+    # pytest runs in a fresh interpreter so this module is not imported
+    # twice; every xdist worker gets a private SQLite database (conftest.py)
+    args = [sys.executable, '-m', 'pytest', __file__, '-v', *pytest_args]
+    if importlib.util.find_spec('xdist'):
+        args += ['-n', 'auto']
+    exit_code = subprocess.call(args, cwd=project_root)
+    
+    print()
+    print("Test completed at:", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    print("=" * 70)
+    
+    return exit_code == 0
+
 
 if __name__ == '__main__':
-    success = run_basic_tests()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    success = run_tests(sys.argv[1:])
+    sys.exit(0 if success else 1)
@@ -0,0 +1,26 @@
+"""
+Benchmarks for the main pages (needs pytest-benchmark)
+
+Run only these with: pytest --benchmark-only
+"""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+
+class TestPageBenchmarks:
+    """Repeatedly time the busiest pages"""
+
+    def test_dashboard_benchmark(self, benchmark, client, init_database):
+        """Dashboard renders within 2 seconds on average"""
+        response = benchmark(client.get, '/')
+
+        assert response.status_code == 200
+        assert benchmark.stats['mean'] < 2.0
+
+    def test_product_list_benchmark(self, benchmark, client, init_database):
+        """Product list renders within 2 seconds on average"""
+        response = benchmark(client.get, '/products')
+
+        assert response.status_code == 200
+        assert benchmark.stats['mean'] < 2.0
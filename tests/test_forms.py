@@ -6,10 +6,41 @@ from forms import ProductForm, CategoryForm, StockMovementForm, ReportForm
 from datetime import date
 
 
+def _form_factory(form_class, field_name, choices):
+    """Return a builder that creates a fresh form with the given choices.
+    
+    A new instance per call, so no request or CSRF state carries over
+    between tests.
+    """
+    def _make(data):
+        form = form_class(data=data)
+        getattr(form, field_name).choices = choices
+        return form
+    return _make
+
+
+@pytest.fixture(scope='session')
+def product_form_factory():
+    """Build ProductForms with a single test category choice"""
+    return _form_factory(ProductForm, 'category_id', [(1, 'Test Category')])
+
+
+@pytest.fixture(scope='session')
+def stock_movement_form_factory():
+    """Build StockMovementForms with a single test product choice"""
+    return _form_factory(StockMovementForm, 'product_id', [(1, 'Test Product')])
+
+
+@pytest.fixture(scope='session')
+def report_form_factory():
+    """Build ReportForms with the 'All Categories' choice"""
+    return _form_factory(ReportForm, 'category_id', [('', 'All Categories'), ('1', 'Test Category')])
+
+
 class TestProductForm:
     """Test ProductForm validation"""
     
-    def test_valid_product_form(self, client):
+    def test_valid_product_form(self, client, product_form_factory):
         """Test valid product form"""
         form_data = {
             'name': 'Test Product',
@@ -20,12 +51,11 @@ class TestProductForm:
             'category_id': 1
         }
         
-        form = ProductForm(data=form_data)
-        form.category_id.choices = [(1, 'Test Category')]
+        form = product_form_factory(form_data)
         
         assert form.validate() is True
     
-    def test_product_form_missing_name(self, client):
+    def test_product_form_missing_name(self, client, product_form_factory):
         """Test product form with missing name"""
         form_data = {
             'barcode': '1234567890',
@@ -35,13 +65,12 @@ class TestProductForm:
             'category_id': 1
         }
         
-        form = ProductForm(data=form_data)
-        form.category_id.choices = [(1, 'Test Category')]
+        form = product_form_factory(form_data)
         
         assert form.validate() is False
         assert 'This field is required.' in form.name.errors
     
-    def test_product_form_invalid_price(self, client):
+    def test_product_form_invalid_price(self, client, product_form_factory):
         """Test product form with invalid price"""
         form_data = {
             'name': 'Test Product',
@@ -52,13 +81,12 @@ class TestProductForm:
             'category_id': 1
         }
         
-        form = ProductForm(data=form_data)
-        form.category_id.choices = [(1, 'Test Category')]
+        form = product_form_factory(form_data)
         
         assert form.validate() is False
         assert 'Number must be at least 0.' in form.price.errors
     
-    def test_product_form_long_name(self, client):
+    def test_product_form_long_name(self, client, product_form_factory):
         """Test product form with too long name"""
         form_data = {
             'name': 'A' * 101,  # 101 characters, max is 100
@@ -68,13 +96,12 @@ class TestProductForm:
             'category_id': 1
         }
         
-        form = ProductForm(data=form_data)
-        form.category_id.choices = [(1, 'Test Category')]
+        form = product_form_factory(form_data)
         
         assert form.validate() is False
         assert 'Field must be between 2 and 100 characters long.' in form.name.errors
     
-    def test_product_form_optional_barcode(self, client):
+    def test_product_form_optional_barcode(self, client, product_form_factory):
         """Test product form with optional barcode"""
         form_data = {
             'name': 'Test Product',
@@ -84,8 +111,7 @@ class TestProductForm:
             'category_id': 1
         }
         
-        form = ProductForm(data=form_data)
-        form.category_id.choices = [(1, 'Test Category')]
+        form = product_form_factory(form_data)
         
         assert form.validate() is True
         assert form.barcode.data is None or form.barcode.data == ''
@@ -149,7 +175,7 @@ class TestCategoryForm:
 class TestStockMovementForm:
     """Test StockMovementForm validation"""
     
-    def test_valid_stock_movement_form(self, client):
+    def test_valid_stock_movement_form(self, client, stock_movement_form_factory):
         """Test valid stock movement form"""
         form_data = {
             'product_id': 1,
@@ -158,12 +184,11 @@ class TestStockMovementForm:
             'description': 'Restocking'
         }
         
-        form = StockMovementForm(data=form_data)
-        form.product_id.choices = [(1, 'Test Product')]
+        form = stock_movement_form_factory(form_data)
         
         assert form.validate() is True
     
-    def test_stock_movement_form_missing_product(self, client):
+    def test_stock_movement_form_missing_product(self, client, stock_movement_form_factory):
         """Test stock movement form with missing product"""
         form_data = {
             'type': 'inflow',
@@ -171,13 +196,12 @@ class TestStockMovementForm:
             'description': 'Restocking'
         }
         
-        form = StockMovementForm(data=form_data)
-        form.product_id.choices = [(1, 'Test Product')]
+        form = stock_movement_form_factory(form_data)
         
         assert form.validate() is False
         assert 'This field is required.' in form.product_id.errors
     
-    def test_stock_movement_form_invalid_type(self, client):
+    def test_stock_movement_form_invalid_type(self, client, stock_movement_form_factory):
         """Test stock movement form with invalid type"""
         form_data = {
             'product_id': 1,
@@ -186,13 +210,12 @@ class TestStockMovementForm:
             'description': 'Restocking'
         }
         
-        form = StockMovementForm(data=form_data)
-        form.product_id.choices = [(1, 'Test Product')]
+        form = stock_movement_form_factory(form_data)
         
         assert form.validate() is False
         assert 'Not a valid choice' in form.type.errors
     
-    def test_stock_movement_form_zero_amount(self, client):
+    def test_stock_movement_form_zero_amount(self, client, stock_movement_form_factory):
         """Test stock movement form with zero amount"""
         form_data = {
             'product_id': 1,
@@ -201,13 +224,12 @@ class TestStockMovementForm:
             'description': 'Restocking'
         }
         
-        form = StockMovementForm(data=form_data)
-        form.product_id.choices = [(1, 'Test Product')]
+        form = stock_movement_form_factory(form_data)
         
         assert form.validate() is False
         assert 'Number must be at least 1.' in form.amount.errors
     
-    def test_stock_movement_form_optional_description(self, client):
+    def test_stock_movement_form_optional_description(self, client, stock_movement_form_factory):
         """Test stock movement form with optional description"""
         form_data = {
             'product_id': 1,
@@ -215,8 +237,7 @@ class TestStockMovementForm:
             'amount': 10
         }
         
-        form = StockMovementForm(data=form_data)
-        form.product_id.choices = [(1, 'Test Product')]
+        form = stock_movement_form_factory(form_data)
         
         assert form.validate() is True
 
@@ -224,7 +245,7 @@ class TestStockMovementForm:
 class TestReportForm:
     """Test ReportForm validation"""
     
-    def test_valid_report_form(self, client):
+    def test_valid_report_form(self, client, report_form_factory):
         """Test valid report form"""
         form_data = {
             'starting_date': date(2023, 1, 1),
@@ -232,25 +253,23 @@ class TestReportForm:
             'category_id': '1'
         }
         
-        form = ReportForm(data=form_data)
-        form.category_id.choices = [('', 'All Categories'), ('1', 'Test Category')]
+        form = report_form_factory(form_data)
         
         assert form.validate() is True
     
-    def test_report_form_missing_dates(self, client):
+    def test_report_form_missing_dates(self, client, report_form_factory):
         """Test report form with missing dates"""
         form_data = {
             'category_id': '1'
         }
         
-        form = ReportForm(data=form_data)
-        form.category_id.choices = [('', 'All Categories'), ('1', 'Test Category')]
+        form = report_form_factory(form_data)
         
         assert form.validate() is False
         assert 'This field is required.' in form.starting_date.errors
         assert 'This field is required.' in form.ending_date.errors
     
-    def test_report_form_optional_category(self, client):
+    def test_report_form_optional_category(self, client, report_form_factory):
         """Test report form with optional category"""
         form_data = {
             'starting_date': date(2023, 1, 1),
@@ -258,12 +277,11 @@ class TestReportForm:
             'category_id': ''  # Empty string for all categories
         }
         
-        form = ReportForm(data=form_data)
-        form.category_id.choices = [('', 'All Categories'), ('1', 'Test Category')]
+        form = report_form_factory(form_data)
         
         assert form.validate() is True
     
-    def test_report_form_invalid_date_range(self, client):
+    def test_report_form_invalid_date_range(self, client, report_form_factory):
         """Test report form with end date before start date"""
         # Note: This validation would need to be added to the form
         # as a custom validator if we want to check date ranges
@@ -273,8 +291,7 @@ class TestReportForm:
             'category_id': '1'
         }
         
-        form = ReportForm(data=form_data)
-        form.category_id.choices = [('', 'All Categories'), ('1', 'Test Category')]
+        form = report_form_factory(form_data)
         
         # Currently, this will validate as True since we don't have 
         # date range validation in the form
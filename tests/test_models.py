@@ -2,9 +2,22 @@
 Unit tests for Models
 """
 import pytest
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 from models import Product, Category, StockMovement, db
 from datetime import datetime
 
+pytestmark = pytest.mark.query_budget(300)
+
+
+def _load_strict(model, pk, *eager):
+    """Reload a row with the given eager loads only; any other lazy load
+    raises, so a relationship that would cost one query per row fails"""
+    return db.session.scalars(
+        db.select(model).filter_by(id=pk)
+        .options(*eager, raiseload('*'))
+        .execution_options(populate_existing=True)
+    ).one()
+
 
 class TestCategoryModel:
     """Test Category model"""
@@ -67,11 +80,18 @@ class TestProductModel:
         critical_product = data['products'][1]  # stock: 3, min_stock: 10
         assert critical_product.critical_stock is True
     
+    def test_critical_stock_filter(self, client, init_database):
+        """Test critical stock as a SQL filter matches the Python check"""
+        data = init_database
+        
+        critical_ids = {product.id for product in Product.query.filter(Product.critical_stock)}
+        assert critical_ids == {product.id for product in data['products'] if product.critical_stock}
+    
     def test_product_category_relationship(self, client, init_database):
         """Test product-category relationship"""
         data = init_database
-        product = data['products'][0]
-        category = data['categories'][0]
+        product = _load_strict(Product, data['products'][0].id, joinedload(Product.categorie))
+        category = _load_strict(Category, data['categories'][0].id, selectinload(Category.products))
         
         assert product.categorie == category
         assert product in category.products
@@ -136,8 +156,8 @@ class TestStockMovementModel:
     def test_stock_movement_product_relationship(self, client, init_database):
         """Test stock movement-product relationship"""
         data = init_database
-        movement = data['movements'][0]
-        product = data['products'][0]
+        movement = _load_strict(StockMovement, data['movements'][0].id, joinedload(StockMovement.product))
+        product = _load_strict(Product, data['products'][0].id, selectinload(Product.movements))
         
         assert movement.product == product
         assert movement in product.movements
@@ -189,7 +209,7 @@ class TestModelRelationships:
     def test_cascade_delete_category(self, client, init_database):
         """Test what happens when category is deleted"""
         data = init_database
-        category = data['categories'][0]
+        category = _load_strict(Category, data['categories'][0].id, selectinload(Category.products))
         products_count = len(category.products)
         
         # Should not be able to delete category with products
@@ -199,7 +219,7 @@ class TestModelRelationships:
     def test_cascade_delete_product(self, client, init_database):
         """Test what happens when product is deleted"""
         data = init_database
-        product = data['products'][0]
+        product = _load_strict(Product, data['products'][0].id, selectinload(Product.movements))
         movements_count = len(product.movements)
         
         assert movements_count > 0
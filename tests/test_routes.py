@@ -2,8 +2,16 @@
 Integration tests for Flask routes
 """
 import pytest
-import json
+from io import BytesIO
+from openpyxl import load_workbook
+from sqlalchemy import insert, select
+from app import PER_PAGE
 from models import Product, Category, StockMovement, db
+from helpers import flashed_messages
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+pytestmark = pytest.mark.query_budget(800)
 
 
 class TestDashboardRoutes:
@@ -14,17 +22,27 @@ class TestDashboardRoutes:
         response = client.get('/')
         
         assert response.status_code == 200
-        assert b'Dashboard' in response.data
-        assert b'Total Products' in response.data
-        assert b'Total Stock' in response.data
-    
-    def test_dashboard_pdf_export(self, client, init_database):
-        """Test dashboard PDF export"""
-        response = client.get('/dashboard/export/pdf')
-        
-        assert response.status_code == 200
-        assert response.content_type == 'application/pdf'
-        assert 'dashboard_report_' in response.headers['Content-Disposition']
+        body = response.data
+        assert b'Dashboard' in body
+        assert b'Total Products' in body
+        assert b'Total Stock' in body
+    
+    def test_dashboard_pdf_export_cached_until_data_changes(self, client, init_database):
+        """Test dashboard PDF is reused until products change"""
+        category_id = Category.query.filter_by(name='Electronics').first().id
+        
+        first = client.get('/dashboard/export/pdf').data
+        assert client.get('/dashboard/export/pdf').data == first
+        
+        client.post('/product/add', data={
+            'name': 'Headphones',
+            'price': 59.99,
+            'stock': 8,
+            'min_stock': 2,
+            'category_id': category_id
+        })
+        
+        assert client.get('/dashboard/export/pdf').data != first
 
 
 class TestProductRoutes:
@@ -35,55 +53,72 @@ class TestProductRoutes:
         response = client.get('/products')
         
         assert response.status_code == 200
-        assert b'Products' in response.data
-        assert b'Laptop' in response.data
-        assert b'T-Shirt' in response.data
+        body = response.data
+        assert b'Products' in body
+        assert b'Laptop' in body
+        assert b'T-Shirt' in body
     
     def test_product_list_with_search(self, client, init_database):
         """Test product list with search parameter"""
         response = client.get('/products?search=Laptop')
         
         assert response.status_code == 200
-        assert b'Laptop' in response.data
-        assert b'T-Shirt' not in response.data
+        body = response.data
+        assert b'Laptop' in body
+        assert b'T-Shirt' not in body
     
-    def test_product_list_with_category_filter(self, client, init_database):
+    def test_product_list_with_category_filter(self, client, electronics_category_id):
         """Test product list with category filter"""
-        data = init_database
-        electronics_category = data['categories'][0]
-        
-        response = client.get(f'/products?category={electronics_category.id}')
+        response = client.get(f'/products?category={electronics_category_id}')
         
         assert response.status_code == 200
-        assert b'Laptop' in response.data
-        assert b'T-Shirt' not in response.data
+        body = response.data
+        assert b'Laptop' in body
+        assert b'T-Shirt' not in body
+    
+    def test_product_list_pagination(self, client, seed_ids):
+        """Test keyset pagination links on the product list"""
+        db.session.add_all([
+            Product(name=f'Bulk {i}', price=1, stock=10, min_stock=1, category_id=seed_ids['categories'][2])
+            for i in range(25)
+        ])
+        db.session.commit()
+        product_ids = db.session.scalars(select(Product.id).order_by(Product.id)).all()
+        last_on_first_page, first_on_second_page = product_ids[PER_PAGE - 1:PER_PAGE + 1]
+        
+        first_page = client.get('/products')
+        assert f'after_id={last_on_first_page}'.encode() in first_page.data
+        assert b'before_id' not in first_page.data
+        
+        second_page = client.get(f'/products?after_id={last_on_first_page}')
+        assert b'Bulk 24' in second_page.data
+        assert f'before_id={first_on_second_page}'.encode() in second_page.data
+        assert b'after_id=' not in second_page.data
     
     def test_product_add_get(self, client, init_database):
         """Test product add form page"""
         response = client.get('/product/add')
         
         assert response.status_code == 200
-        assert b'Add New Product' in response.data
-        assert b'Product Name' in response.data
+        body = response.data
+        assert b'Add New Product' in body
+        assert b'Product Name' in body
     
-    def test_product_add_post_valid(self, client, init_database):
+    def test_product_add_post_valid(self, client, electronics_category_id):
         """Test adding a new product with valid data"""
-        data = init_database
-        category = data['categories'][0]
-        
         form_data = {
             'name': 'New Product',
             'barcode': '999888777',
             'price': 99.99,
             'stock': 50,
             'min_stock': 10,
-            'category_id': category.id
+            'category_id': electronics_category_id
         }
         
-        response = client.post('/product/add', data=form_data, follow_redirects=True)
+        response = client.post('/product/add', data=form_data)
         
-        assert response.status_code == 200
-        assert b'successfully added' in response.data
+        assert response.status_code == 302
+        assert 'successfully added' in ' '.join(flashed_messages(client))
         
         # Verify product was created
         new_product = Product.query.filter_by(name='New Product').first()
@@ -103,7 +138,30 @@ class TestProductRoutes:
         response = client.post('/product/add', data=form_data)
         
         assert response.status_code == 200
-        assert b'This field is required' in response.data or b'error' in response.data.lower()
+        body = response.data
+        assert b'This field is required' in body or b'error' in body.lower()
+    
+    def test_product_add_duplicate_barcode(self, client, init_database):
+        """Test adding a product with a barcode that is already in use"""
+        category_id = Category.query.filter_by(name='Electronics').first().id
+        
+        form_data = {
+            'name': 'Second Laptop',
+            'barcode': '123456789',
+            'price': 899.99,
+            'stock': 5,
+            'min_stock': 1,
+            'category_id': category_id
+        }
+        
+        response = client.post('/product/add', data=form_data)
+        
+        assert response.status_code == 200
+        assert b'barcode is already in use' in response.data
+        
+        # Neither the product nor its opening movement was saved
+        assert Product.query.filter_by(name='Second Laptop').first() is None
+        assert StockMovement.query.count() == 2
     
     def test_product_edit_get(self, client, init_database):
         """Test product edit form page"""
@@ -113,8 +171,9 @@ class TestProductRoutes:
         response = client.get(f'/product/edit/{product.id}')
         
         assert response.status_code == 200
-        assert b'Edit Product' in response.data
-        assert product.name.encode() in response.data
+        body = response.data
+        assert b'Edit Product' in body
+        assert product.name.encode() in body
     
     def test_product_edit_post_valid(self, client, init_database):
         """Test editing a product with valid data"""
@@ -130,57 +189,41 @@ class TestProductRoutes:
             'category_id': category.id
         }
         
-        response = client.post(f'/product/edit/{product.id}', data=form_data, follow_redirects=True)
+        response = client.post(f'/product/edit/{product.id}', data=form_data)
         
-        assert response.status_code == 200
-        assert b'was updated' in response.data
+        assert response.status_code == 302
+        assert 'was updated' in ' '.join(flashed_messages(client))
         
         # Verify product was updated
-        updated_product = Product.query.get(product.id)
+        updated_product = db.session.get(Product, product.id)
         assert updated_product.name == 'Updated Laptop'
         assert updated_product.price == 1199.99
     
-    def test_product_edit_nonexistent(self, client, init_database):
-        """Test editing a non-existent product"""
-        response = client.get('/product/edit/999')
-        
-        assert response.status_code == 404
-    
-    def test_product_delete_post(self, client, init_database):
+    def test_product_delete_post(self, client, seed_ids):
         """Test deleting a product"""
-        data = init_database
         # Use product without movements for successful deletion
-        product = data['products'][2]  # Python Book has no movements
+        product_id = seed_ids['products'][2]  # Python Book has no movements
         
-        response = client.post(f'/product/delete/{product.id}', follow_redirects=True)
+        response = client.post(f'/product/delete/{product_id}')
         
         assert response.status_code == 200
         
         # Verify product was deleted
-        deleted_product = Product.query.get(product.id)
+        deleted_product = db.session.get(Product, product_id)
         assert deleted_product is None
     
-    def test_product_delete_with_movements(self, client, init_database):
+    def test_product_delete_with_movements(self, client, seed_ids):
         """Test deleting a product with stock movements"""
-        data = init_database
-        product = data['products'][0]  # Laptop has movements
+        product_id = seed_ids['products'][0]  # Laptop has movements
         
-        response = client.post(f'/product/delete/{product.id}', follow_redirects=True)
+        response = client.post(f'/product/delete/{product_id}', follow_redirects=True)
         
         assert response.status_code == 200
         assert b'Cannot delete product' in response.data
         
         # Verify product was not deleted
-        existing_product = Product.query.get(product.id)
+        existing_product = db.session.get(Product, product_id)
         assert existing_product is not None
-    
-    def test_product_export_excel(self, client, init_database):
-        """Test product Excel export"""
-        response = client.get('/products/export/excel')
-        
-        assert response.status_code == 200
-        assert response.content_type == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        assert 'products_' in response.headers['Content-Disposition']
 
 
 class TestCategoryRoutes:
@@ -191,17 +234,19 @@ class TestCategoryRoutes:
         response = client.get('/categories')
         
         assert response.status_code == 200
-        assert b'Categories' in response.data
-        assert b'Electronics' in response.data
-        assert b'Clothing' in response.data
+        body = response.data
+        assert b'Categories' in body
+        assert b'Electronics' in body
+        assert b'Clothing' in body
     
     def test_category_add_get(self, client, init_database):
         """Test category add form page"""
         response = client.get('/category/add')
         
         assert response.status_code == 200
-        assert b'Add New Category' in response.data
-        assert b'Category Name' in response.data
+        body = response.data
+        assert b'Add New Category' in body
+        assert b'Category Name' in body
     
     def test_category_add_post_valid(self, client, init_database):
         """Test adding a new category with valid data"""
@@ -210,16 +255,26 @@ class TestCategoryRoutes:
             'description': 'This is a new category'
         }
         
-        response = client.post('/category/add', data=form_data, follow_redirects=True)
+        response = client.post('/category/add', data=form_data)
         
-        assert response.status_code == 200
-        assert b'successfully added' in response.data
+        assert response.status_code == 302
+        assert 'successfully added' in ' '.join(flashed_messages(client))
         
         # Verify category was created
         new_category = Category.query.filter_by(name='New Category').first()
         assert new_category is not None
         assert new_category.description == 'This is a new category'
     
+    def test_category_add_refreshes_product_form_choices(self, client, init_database):
+        """Test a new category shows up in the cached product form choices"""
+        client.get('/product/add')  # populate the choices cache
+        
+        client.post('/category/add', data={'name': 'Garden', 'description': 'Garden tools'})
+        response = client.get('/product/add')
+        
+        assert response.status_code == 200
+        assert b'Garden' in response.data
+    
     def test_category_edit_get(self, client, init_database):
         """Test category edit form page"""
         data = init_database
@@ -228,41 +283,51 @@ class TestCategoryRoutes:
         response = client.get(f'/category/edit/{category.id}')
         
         assert response.status_code == 200
-        assert b'Edit Category' in response.data
-        assert category.name.encode() in response.data
+        body = response.data
+        assert b'Edit Category' in body
+        assert category.name.encode() in body
     
-    def test_category_edit_post_valid(self, client, init_database):
+    def test_category_edit_post_valid(self, client, electronics_category_id):
         """Test editing a category with valid data"""
-        data = init_database
-        category = data['categories'][0]
-        
         form_data = {
             'name': 'Updated Electronics',
             'description': 'Updated electronic products category'
         }
         
-        response = client.post(f'/category/edit/{category.id}', data=form_data, follow_redirects=True)
+        response = client.post(f'/category/edit/{electronics_category_id}', data=form_data)
         
-        assert response.status_code == 200
-        assert b'was updated' in response.data
+        assert response.status_code == 302
+        assert 'was updated' in ' '.join(flashed_messages(client))
         
         # Verify category was updated
-        updated_category = Category.query.get(category.id)
+        updated_category = db.session.get(Category, electronics_category_id)
         assert updated_category.name == 'Updated Electronics'
     
-    def test_category_delete_with_products(self, client, init_database):
+    def test_category_delete_with_products(self, client, electronics_category_id):
         """Test deleting a category with products"""
-        data = init_database
-        category = data['categories'][0]  # Electronics has products
+        # Electronics has products
+        response = client.post(f'/category/delete/{electronics_category_id}')
         
-        response = client.post(f'/category/delete/{category.id}', follow_redirects=True)
-        
-        assert response.status_code == 200
-        assert b'Cannot delete category' in response.data
+        assert response.status_code == 302
+        assert 'Cannot delete category' in ' '.join(flashed_messages(client))
         
         # Verify category was not deleted
-        existing_category = Category.query.get(category.id)
+        existing_category = db.session.get(Category, electronics_category_id)
         assert existing_category is not None
+    
+    def test_category_choices_follow_delete_then_add(self, client, init_database):
+        """Test the category options refresh when a new category reuses a deleted id"""
+        client.post('/category/add', data={'name': 'Textile', 'description': ''})
+        textile_id = Category.query.filter_by(name='Textile').one().id
+        client.get('/product/add')
+        
+        client.post(f'/category/delete/{textile_id}')
+        client.post('/category/add', data={'name': 'Garden', 'description': ''})
+        response = client.get('/product/add')
+        
+        body = response.data
+        assert b'>Garden</option>' in body
+        assert b'>Textile</option>' not in body
 
 
 class TestStockMovementRoutes:
@@ -273,9 +338,31 @@ class TestStockMovementRoutes:
         response = client.get('/stock-movement')
         
         assert response.status_code == 200
-        assert b'Stock Movement' in response.data
-        assert b'Product' in response.data
-        assert b'Process Type' in response.data
+        body = response.data
+        assert b'Stock Movement' in body
+        assert b'Product' in body
+        assert b'Process Type' in body
+    
+    def test_stock_movement_sees_product_added_elsewhere(self, client, electronics_category_id):
+        """Test the cached product choices pick up rows written by another process"""
+        client.get('/stock-movement')
+        # Written straight to the database, like another worker would
+        product_id = db.session.execute(
+            insert(Product).values(name='Drill', price=59.99, stock=4,
+                                   min_stock=2, category_id=electronics_category_id)
+            .returning(Product.id)
+        ).scalar_one()
+        
+        form_data = {
+            'product_id': product_id,
+            'type': 'inflow',
+            'amount': 6,
+            'description': 'Restock'
+        }
+        response = client.post('/stock-movement', data=form_data)
+        
+        assert response.status_code == 302
+        assert db.session.get(Product, product_id).stock == 10
     
     def test_stock_movement_post_inflow(self, client, init_database):
         """Test adding stock inflow"""
@@ -290,13 +377,13 @@ class TestStockMovementRoutes:
             'description': 'New stock arrival'
         }
         
-        response = client.post('/stock-movement', data=form_data, follow_redirects=True)
+        response = client.post('/stock-movement', data=form_data)
         
-        assert response.status_code == 200
-        assert b'Stock movement recorded' in response.data
+        assert response.status_code == 302
+        assert 'Stock movement was saved' in ' '.join(flashed_messages(client))
         
         # Verify stock was updated
-        updated_product = Product.query.get(product.id)
+        updated_product = db.session.get(Product, product.id)
         assert updated_product.stock == original_stock + 25
         
         # Verify movement was recorded
@@ -320,13 +407,13 @@ class TestStockMovementRoutes:
             'description': 'Sales'
         }
         
-        response = client.post('/stock-movement', data=form_data, follow_redirects=True)
+        response = client.post('/stock-movement', data=form_data)
         
-        assert response.status_code == 200
-        assert b'Stock movement recorded' in response.data
+        assert response.status_code == 302
+        assert 'Stock movement was saved' in ' '.join(flashed_messages(client))
         
         # Verify stock was updated
-        updated_product = Product.query.get(product.id)
+        updated_product = db.session.get(Product, product.id)
         assert updated_product.stock == original_stock - 5
     
     def test_stock_movement_insufficient_stock(self, client, init_database):
@@ -347,7 +434,7 @@ class TestStockMovementRoutes:
         assert b'Not enough stock' in response.data
         
         # Verify stock was not changed
-        unchanged_product = Product.query.get(product.id)
+        unchanged_product = db.session.get(Product, product.id)
         assert unchanged_product.stock == 3
 
 
@@ -359,8 +446,9 @@ class TestAnalyticsRoutes:
         response = client.get('/analytics')
         
         assert response.status_code == 200
-        assert b'Analytics Dashboard' in response.data
-        assert b'SUMMARY STATISTICS' in response.data
+        body = response.data
+        assert b'Analytics Dashboard' in body
+        assert b'SUMMARY STATISTICS' in body
 
 
 class TestReportRoutes:
@@ -371,9 +459,10 @@ class TestReportRoutes:
         response = client.get('/reports')
         
         assert response.status_code == 200
-        assert b'Reports' in response.data
-        assert b'Starting Date' in response.data
-        assert b'Ending Date' in response.data
+        body = response.data
+        assert b'Reports' in body
+        assert b'Starting Date' in body
+        assert b'Ending Date' in body
     
     def test_reports_generate_post(self, client, init_database):
         """Test generating a report"""
@@ -386,37 +475,55 @@ class TestReportRoutes:
         response = client.post('/reports/generate', data=form_data)
         
         assert response.status_code == 200
-        assert b'Report Results' in response.data or b'products' in response.data.lower()
+        body = response.data
+        assert b'Report Results' in body or b'products' in body.lower()
     
-    def test_reports_export_excel(self, client, init_database):
-        """Test report Excel export"""
-        response = client.get('/reports/export/excel?start_date=2023-01-01&end_date=2023-12-31')
+    @pytest.mark.parametrize('start_date', ['20230101', '2023-W01-1'])
+    def test_report_export_rejects_non_iso_dates(self, client, start_date):
+        """Test report exports only accept YYYY-MM-DD dates"""
+        response = client.get(f'/reports/export/excel?start_date={start_date}&end_date=2023-12-31')
         
-        assert response.status_code == 200
-        assert response.content_type == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        assert response.status_code == 400
+
+
+class TestExportRoutes:
+    """Test the Excel and PDF downloads"""
     
-    def test_reports_export_pdf(self, client, init_database):
-        """Test report PDF export"""
-        response = client.get('/reports/export/pdf?start_date=2023-01-01&end_date=2023-12-31')
+    def test_products_excel_includes_uncategorised_products(self, client, init_database):
+        """Test products without a category are still exported"""
+        db.session.add(Product(name='Orphan', price=2.0, stock=1, min_stock=0))
+        db.session.commit()
+        
+        response = client.get('/products/export/excel')
         
         assert response.status_code == 200
-        assert response.content_type == 'application/pdf'
+        rows = list(load_workbook(BytesIO(response.data), read_only=True).active.values)
+        assert ('Orphan', 'N/A') in [row[1:4:2] for row in rows]
+    
+    @pytest.mark.parametrize('export, content_type, filename_prefix', [
+        ('dashboard_pdf', 'application/pdf', 'dashboard_report_'),
+        ('products_excel', XLSX_MIMETYPE, 'products_'),
+        ('reports_excel', XLSX_MIMETYPE, 'stock_report_'),
+        ('reports_pdf', 'application/pdf', 'stock_report_')
+    ])
+    def test_export_download(self, export_responses, export, content_type, filename_prefix):
+        """Test each export is sent as a download of the right type"""
+        response = export_responses[export]
+        
+        assert response.status_code == 200
+        assert response.content_type == content_type
+        assert f'attachment; filename={filename_prefix}' in response.headers['Content-Disposition']
 
 
 class TestErrorHandling:
     """Test error handling"""
     
-    def test_404_not_found(self, client):
-        """Test 404 error for non-existent routes"""
-        response = client.get('/nonexistent-route')
-        assert response.status_code == 404
-    
-    def test_product_not_found(self, client, init_database):
-        """Test 404 for non-existent product"""
-        response = client.get('/product/edit/999')
-        assert response.status_code == 404
-    
-    def test_category_not_found(self, client, init_database):
-        """Test 404 for non-existent category"""
-        response = client.get('/category/edit/999')
+    @pytest.mark.parametrize('url', [
+        '/nonexistent-route',
+        '/product/edit/999',
+        '/category/edit/999'
+    ])
+    def test_404_not_found(self, client, url):
+        """Test 404 for non-existent routes, products and categories"""
+        response = client.get(url)
         assert response.status_code == 404
\ No newline at end of file